@@ -0,0 +1,260 @@
+# filename: analytics.py
+# Vectorized trend statistics across all biomarkers
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+import biomarkerdash.biomarker as bm
+from biomarkerdash.constants import COLUMN_DRAW_DATE, COLUMN_VALUE
+
+# Columns of the long table built from all biomarkers
+MARKER = "marker"
+REF_MIN = "ref_min"
+REF_MAX = "ref_max"
+UNIT = "unit"
+
+# Position of a value relative to its reference range
+STATUS_LOW = "low"
+STATUS_IN_RANGE = "in range"
+STATUS_HIGH = "high"
+STATUS_UNKNOWN = "unknown"
+
+DAYS_PER_YEAR = 365.25
+
+
+def range_status(
+    values: np.ndarray, min_vals: np.ndarray, max_vals: np.ndarray
+) -> np.ndarray:
+    """
+    Determine where values fall relative to their reference ranges.
+
+    Parameters:
+    - values (np.ndarray): Values to classify.
+    - min_vals (np.ndarray): Lower bound for each value, NaN if unbounded.
+    - max_vals (np.ndarray): Upper bound for each value, NaN if unbounded.
+
+    Returns:
+    - np.ndarray: -1 for values below the range, 1 for values above it and 0
+    for values within it, or without any reference range.
+    """
+    values = np.asarray(values, dtype=float)
+    min_vals = np.asarray(min_vals, dtype=float)
+    max_vals = np.asarray(max_vals, dtype=float)
+    status = np.zeros(values.shape, dtype=np.int8)
+    status[values < min_vals] = -1
+    status[values > max_vals] = 1
+    return status
+
+
+def biomarkers_to_frame(biomarkers: Dict[str, bm.Biomarker]) -> pd.DataFrame:
+    """
+    Combine the histories of all biomarkers into a single long table.
+
+    Args:
+    - biomarkers: Dictionary mapping marker names to Biomarker objects.
+
+    Returns:
+    - DataFrame with one row per measurement, sorted by marker and draw date,
+    with the numeric value and the marker's reference range and unit.
+    Values that can't be converted to numbers are dropped.
+    """
+    columns = [MARKER, COLUMN_DRAW_DATE, COLUMN_VALUE, REF_MIN, REF_MAX, UNIT]
+    frames = [
+        marker.history.assign(
+            **{
+                MARKER: marker.name,
+                REF_MIN: (
+                    np.nan
+                    if marker.ref_range[0] is None
+                    else marker.ref_range[0]
+                ),
+                REF_MAX: (
+                    np.nan
+                    if marker.ref_range[1] is None
+                    else marker.ref_range[1]
+                ),
+                UNIT: marker.unit,
+            }
+        )
+        for marker in biomarkers.values()
+        if len(marker.history)
+    ]
+    if frames:
+        data = pd.concat(frames, ignore_index=True)[columns]
+    else:
+        data = pd.DataFrame(columns=columns)
+
+    data[COLUMN_DRAW_DATE] = pd.to_datetime(data[COLUMN_DRAW_DATE])
+    data[COLUMN_VALUE] = pd.to_numeric(
+        data[COLUMN_VALUE], errors="coerce"
+    ).astype(float)
+    data[[REF_MIN, REF_MAX]] = data[[REF_MIN, REF_MAX]].astype(float)
+    data = data.dropna(subset=[COLUMN_VALUE])
+    return data.sort_values(
+        [MARKER, COLUMN_DRAW_DATE], kind="stable"
+    ).reset_index(drop=True)
+
+
+def compute_trends_from_frame(
+    data: pd.DataFrame, window: int = 3
+) -> pd.DataFrame:
+    """
+    Compute trend statistics for every biomarker in one grouped pass.
+
+    Args:
+    - data: Long table of all measurements, as built by biomarkers_to_frame.
+    - window: Number of most recent draws averaged for the rolling mean.
+
+    Returns:
+    - DataFrame indexed by marker name with the columns:
+        - unit, ref_min, ref_max: Unit and reference range of the marker.
+        - count: Number of numeric values.
+        - first_date, latest_date: Dates of the first and latest draws.
+        - latest_value: Value of the latest draw.
+        - previous_date, previous_value: Date and value of the draw before
+        the latest one.
+        - change: Difference between the latest and previous values.
+        - slope_per_year: Slope of a least squares line fit through all
+        values, in units per year.
+        - rolling_mean: Mean of the latest `window` values.
+        - status: Whether the latest value is low, in range, high or
+        unknown (no reference range).
+        - crossed: Whether the values ever moved in or out of the reference
+        range.
+        - last_crossing_date: Date of the latest draw that moved in or out
+        of the reference range.
+        - last_in_range_date: Date of the latest draw within the reference
+        range.
+    """
+    values = data[COLUMN_VALUE]
+    dates = data[COLUMN_DRAW_DATE]
+    groups = data.groupby(MARKER, sort=False)
+
+    has_range = data[REF_MIN].notna() | data[REF_MAX].notna()
+    status = pd.Series(
+        range_status(values, data[REF_MIN], data[REF_MAX]), index=data.index
+    )
+    first_in_group = data[MARKER] != data[MARKER].shift()
+    crossing = has_range & ~first_in_group & (status != status.shift())
+
+    # Least squares slope, with x and y centered within each marker
+    years = (dates - dates.min()).dt.days / DAYS_PER_YEAR
+    x = years - years.groupby(data[MARKER]).transform("mean")
+    y = values - groups[COLUMN_VALUE].transform("mean")
+
+    rolling = groups[COLUMN_VALUE].rolling(window, min_periods=1).mean()
+
+    data = data.assign(
+        _status=status,
+        _has_range=has_range,
+        _previous_value=groups[COLUMN_VALUE].shift(),
+        _previous_date=groups[COLUMN_DRAW_DATE].shift(),
+        _rolling=rolling.reset_index(level=0, drop=True),
+        _xy=x * y,
+        _xx=x * x,
+        _crossing=crossing,
+        _crossing_date=dates.where(crossing),
+        _in_range_date=dates.where(has_range & (status == 0)),
+    )
+    trends = data.groupby(MARKER, sort=False).agg(
+        unit=(UNIT, "last"),
+        ref_min=(REF_MIN, "last"),
+        ref_max=(REF_MAX, "last"),
+        count=(COLUMN_VALUE, "size"),
+        first_date=(COLUMN_DRAW_DATE, "first"),
+        latest_date=(COLUMN_DRAW_DATE, "last"),
+        latest_value=(COLUMN_VALUE, "last"),
+        previous_date=("_previous_date", "last"),
+        previous_value=("_previous_value", "last"),
+        rolling_mean=("_rolling", "last"),
+        latest_status=("_status", "last"),
+        has_range=("_has_range", "last"),
+        crossed=("_crossing", "any"),
+        last_crossing_date=("_crossing_date", "max"),
+        last_in_range_date=("_in_range_date", "max"),
+        sum_xy=("_xy", "sum"),
+        sum_xx=("_xx", "sum"),
+    )
+
+    trends["change"] = trends["latest_value"] - trends["previous_value"]
+    trends["slope_per_year"] = trends["sum_xy"] / trends["sum_xx"].where(
+        trends["sum_xx"] > 0
+    )
+    trends["status"] = np.select(
+        [
+            ~trends["has_range"],
+            trends["latest_status"] < 0,
+            trends["latest_status"] > 0,
+        ],
+        [STATUS_UNKNOWN, STATUS_LOW, STATUS_HIGH],
+        default=STATUS_IN_RANGE,
+    )
+    trends.index.name = MARKER
+
+    return trends[
+        [
+            "unit",
+            "ref_min",
+            "ref_max",
+            "count",
+            "first_date",
+            "latest_date",
+            "latest_value",
+            "previous_date",
+            "previous_value",
+            "change",
+            "slope_per_year",
+            "rolling_mean",
+            "status",
+            "crossed",
+            "last_crossing_date",
+            "last_in_range_date",
+        ]
+    ]
+
+
+def compute_trends(
+    biomarkers: Dict[str, bm.Biomarker], window: int = 3
+) -> pd.DataFrame:
+    """
+    Compute trend statistics for every biomarker in one grouped pass.
+
+    Args:
+    - biomarkers: Dictionary mapping marker names to Biomarker objects.
+    - window: Number of most recent draws averaged for the rolling mean.
+
+    Returns:
+    - DataFrame indexed by marker name, see compute_trends_from_frame for
+    the columns.
+    """
+    return compute_trends_from_frame(biomarkers_to_frame(biomarkers), window)
@@ -0,0 +1,263 @@
+# filename: archive.py
+# Memory-mapped columnar archive of biomarker results for many patients
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+import biomarkerdash.biomarker as bm
+from biomarkerdash.analytics import (
+    MARKER,
+    REF_MAX,
+    REF_MIN,
+    biomarkers_to_frame,
+    range_status,
+)
+from biomarkerdash.constants import COLUMN_DRAW_DATE, COLUMN_VALUE
+
+METADATA_FILENAME = "metadata.json"
+OFFSETS_FILENAME = "offsets.bin"
+ARCHIVE_VERSION = 1
+
+# Name and dtype of every column array, each stored in "<name>.bin"
+PATIENT = "patient"
+DATE = "date"
+VALUE = "value"
+STATUS = "status"
+COLUMNS = {
+    PATIENT: np.dtype("<i4"),
+    MARKER: np.dtype("<i4"),
+    DATE: np.dtype("<M8[D]"),
+    VALUE: np.dtype("<f8"),
+    STATUS: np.dtype("i1"),
+}
+
+# Status of values whose marker has no reference range. Other values have
+# the status returned by analytics.range_status: -1 below the range, 0
+# within it and 1 above it.
+STATUS_NO_RANGE = 2
+
+
+class ArchiveWriter:
+    def __init__(self, directory: str):
+        """
+        Initializes a writer that appends patients to a new archive.
+
+        Each column is streamed to its own raw binary file as patients are
+        added, so only one patient is held in memory at a time. The marker
+        and patient vocabularies and the per-patient offsets are written
+        when the writer is closed. Until then the directory holds no
+        metadata, so an archive that failed halfway can't be opened.
+
+        Args:
+        - directory: Directory to create the archive in.
+        """
+        os.makedirs(directory, exist_ok=True)
+        # Remove the metadata of an archive being overwritten first, so it
+        # can't describe the new column files
+        metadata_path = os.path.join(directory, METADATA_FILENAME)
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+        self.directory = directory
+        self.patients: List[str] = []
+        self.markers: Dict[str, int] = {}
+        self.offsets = [0]
+        self._files = {
+            name: open(os.path.join(directory, f"{name}.bin"), "wb")
+            for name in COLUMNS
+        }
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_files()
+
+    def add_patient(
+        self, patient: str, biomarkers: Dict[str, bm.Biomarker]
+    ) -> int:
+        """
+        Append the numeric results of a patient to the archive.
+
+        Args:
+        - patient: Identifier of the patient, unique within the archive.
+        - biomarkers: Dictionary mapping marker names to Biomarker objects.
+
+        Returns:
+        - Number of results appended.
+        """
+        if patient in self.patients:
+            raise ValueError(f"Patient {patient} is already in the archive")
+        data = biomarkers_to_frame(biomarkers)
+        for name in data[MARKER].unique():
+            self.markers.setdefault(name, len(self.markers))
+
+        status = range_status(data[COLUMN_VALUE], data[REF_MIN], data[REF_MAX])
+        status[(data[REF_MIN].isna() & data[REF_MAX].isna()).to_numpy()] = (
+            STATUS_NO_RANGE
+        )
+        columns = {
+            PATIENT: np.full(len(data), len(self.patients)),
+            MARKER: data[MARKER].map(self.markers).to_numpy(),
+            DATE: data[COLUMN_DRAW_DATE].to_numpy(),
+            VALUE: data[COLUMN_VALUE].to_numpy(),
+            STATUS: status,
+        }
+        for name, dtype in COLUMNS.items():
+            columns[name].astype(dtype).tofile(self._files[name])
+
+        self.patients.append(patient)
+        self.offsets.append(self.offsets[-1] + len(data))
+        return len(data)
+
+    def _close_files(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def close(self) -> None:
+        """Write the offsets and metadata, and close the column files."""
+        if not self._files:
+            return
+        self._close_files()
+        np.asarray(self.offsets, dtype="<i8").tofile(
+            os.path.join(self.directory, OFFSETS_FILENAME)
+        )
+        metadata = {
+            "version": ARCHIVE_VERSION,
+            "rows": self.offsets[-1],
+            "columns": {name: dtype.str for name, dtype in COLUMNS.items()},
+            "patients": self.patients,
+            "markers": list(self.markers),
+        }
+        with open(
+            os.path.join(self.directory, METADATA_FILENAME),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            json.dump(metadata, f)
+
+
+class BiomarkerArchive:
+    def __init__(self, directory: str):
+        """
+        Opens an archive written by ArchiveWriter, mapping it read-only.
+
+        The column files are memory-mapped rather than read, so opening an
+        archive is cheap and the pages holding a patient are only loaded
+        when that patient is accessed. The mapping can be shared between
+        worker processes.
+
+        Args:
+        - directory: Directory holding the archive.
+        """
+        with open(
+            os.path.join(directory, METADATA_FILENAME), "r", encoding="utf-8"
+        ) as f:
+            metadata = json.load(f)
+        if metadata["version"] != ARCHIVE_VERSION:
+            raise ValueError(
+                f"Unsupported archive version {metadata['version']}"
+            )
+        self.directory = directory
+        self.patients: List[str] = metadata["patients"]
+        self.markers: List[str] = metadata["markers"]
+        self._patient_index = {
+            patient: i for i, patient in enumerate(self.patients)
+        }
+        self.offsets = np.fromfile(
+            os.path.join(directory, OFFSETS_FILENAME), dtype="<i8"
+        )
+        rows = metadata["rows"]
+        self.columns: Dict[str, np.ndarray] = {
+            name: self._map(name, np.dtype(dtype), rows)
+            for name, dtype in metadata["columns"].items()
+        }
+
+    def _map(self, name: str, dtype: np.dtype, rows: int) -> np.ndarray:
+        # Zero-length files can't be memory-mapped
+        if not rows:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(
+            os.path.join(self.directory, f"{name}.bin"),
+            dtype=dtype,
+            mode="r",
+            shape=(rows,),
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns[VALUE])
+
+    def __contains__(self, patient: str) -> bool:
+        return patient in self._patient_index
+
+    def patient_columns(self, patient: str) -> Dict[str, np.ndarray]:
+        """
+        Return the columns of a patient's results, without copying them.
+
+        Args:
+        - patient: Identifier of the patient.
+
+        Returns:
+        - Dictionary mapping column names to read-only views of the archive,
+        sorted by marker name and draw date.
+        """
+        if patient not in self._patient_index:
+            raise KeyError(patient)
+        i = self._patient_index[patient]
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return {
+            name: column[start:stop] for name, column in self.columns.items()
+        }
+
+    def patient_frame(self, patient: str) -> pd.DataFrame:
+        """
+        Return a patient's results as a DataFrame, with marker names as a
+        categorical column decoded from the marker codes.
+        """
+        columns = self.patient_columns(patient)
+        return pd.DataFrame(
+            {
+                MARKER: pd.Categorical.from_codes(
+                    columns[MARKER], categories=self.markers
+                ),
+                COLUMN_DRAW_DATE: columns[DATE],
+                COLUMN_VALUE: columns[VALUE],
+                STATUS: columns[STATUS],
+            },
+            copy=False,
+        )
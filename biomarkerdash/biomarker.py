@@ -30,10 +30,12 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple, Union
 
+import biomarkerdash.diagnostics as diag
 from biomarkerdash.constants import (
     COLUMN_MARKER_NAME,
     COLUMN_DRAW_DATE,
@@ -42,6 +44,9 @@ from biomarkerdash.constants import (
     COLUMN_UNIT,
 )
 
+# Types accepted as the bounds of a time window
+DateLike = Union[str, datetime, pd.Timestamp]
+
 
 class Biomarker:
     def __init__(
@@ -69,17 +74,94 @@ class Biomarker:
         # self.category = category
         self.unit = unit
         self.ref_range = ref_range
-        self.history = history or pd.DataFrame(
-            columns=[COLUMN_DRAW_DATE, COLUMN_VALUE]
+        self.history = (
+            history
+            if history is not None
+            else pd.DataFrame(columns=[COLUMN_DRAW_DATE, COLUMN_VALUE])
         )
 
+    @property
+    def history(self) -> pd.DataFrame:
+        """DataFrame containing time series data, sorted by draw date."""
+        self._ensure_sorted()
+        return self._history
+
+    @history.setter
+    def history(self, history: pd.DataFrame) -> None:
+        self._history = history
+        self._dates: Optional[np.ndarray] = None
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Draw dates of the history as a sorted datetime64 array."""
+        self._ensure_sorted()
+        return self._dates
+
+    def _ensure_sorted(self) -> None:
+        """
+        Sort the history by draw date if it changed since it was last sorted.
+
+        Entries on the same date keep their order, and the sorted draw dates
+        are cached until the history changes again.
+        """
+        if self._dates is not None:
+            return
+        dates = pd.to_datetime(self._history[COLUMN_DRAW_DATE]).to_numpy()
+        if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+            order = np.argsort(dates, kind="stable")
+            self._history = self._history.iloc[order].reset_index(drop=True)
+            dates = dates[order]
+        self._dates = dates
+
+    def window(
+        self,
+        since: Optional[DateLike] = None,
+        until: Optional[DateLike] = None,
+    ) -> "Biomarker":
+        """
+        Create a copy of the biomarker with only the history in a window.
+
+        The window is found by binary search on the sorted draw dates.
+
+        Args:
+        - since: First draw date to keep, or None to keep from the start.
+        - until: Last draw date to keep, or None to keep until the end.
+
+        Returns:
+        - Biomarker instance with the history between since and until,
+        inclusive.
+        """
+        dates = self.dates
+        start = (
+            0
+            if since is None
+            else np.searchsorted(dates, pd.Timestamp(since).to_datetime64())
+        )
+        stop = (
+            len(dates)
+            if until is None
+            else np.searchsorted(
+                dates, pd.Timestamp(until).to_datetime64(), side="right"
+            )
+        )
+        marker = Biomarker(
+            self.name,
+            self.description,
+            self.unit,
+            self.ref_range,
+            self._history.iloc[start:stop].reset_index(drop=True),
+        )
+        marker._dates = dates[start:stop]
+        return marker
+
     def add_history_entry(self, draw_date_str: str, value: float, unit: str):
         """Add a single history entry to the biomarker."""
         # Parse the date string
         draw_date = datetime.strptime(draw_date_str, "%m/%d/%y")
-        if str(unit) != "nan" and unit != self.unit:
-            print(f"\nunit for {self.name} changed from {self.unit} to {unit}\n")
-        self.history.loc[len(self.history)] = [draw_date, value]
+        if not pd.isna(unit) and unit != self.unit:
+            diag.report(diag.UNIT_CHANGE, self.name, self.unit, unit)
+        self._history.loc[len(self._history)] = [draw_date, value]
+        self._dates = None
 
 
 def parse_row_to_biomarker(
@@ -102,3 +184,28 @@ def parse_row_to_biomarker(
 
     biomarker = Biomarker(name, description, unit, ref_range)
     return biomarker
+
+
+def window_biomarkers(
+    biomarkers: Dict[str, Biomarker],
+    since: Optional[DateLike] = None,
+    until: Optional[DateLike] = None,
+) -> Dict[str, Biomarker]:
+    """
+    Restrict the histories of all biomarkers to a time window.
+
+    Args:
+    - biomarkers: Dictionary mapping marker names to Biomarker objects.
+    - since: First draw date to keep, or None to keep from the start.
+    - until: Last draw date to keep, or None to keep until the end.
+
+    Returns:
+    - Dictionary mapping marker names to windowed Biomarker objects, leaving
+    out biomarkers without any history in the window.
+    """
+    windowed = {}
+    for name, marker in biomarkers.items():
+        marker = marker.window(since, until)
+        if len(marker.history):
+            windowed[name] = marker
+    return windowed
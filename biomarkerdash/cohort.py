@@ -0,0 +1,314 @@
+# filename: cohort.py
+# Mergeable quantile sketches for cohort-wide biomarker statistics
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import biomarkerdash.utils as util
+from biomarkerdash.constants import (
+    COLUMN_MARKER_NAME,
+    COLUMN_UNIT,
+    COLUMN_VALUE,
+)
+
+# Percentiles drawn as cohort bands on the biomarker plots
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class QuantileSketch:
+    def __init__(self, compression: float = 100.0):
+        """
+        Initializes an empty merging t-digest.
+
+        The sketch keeps a bounded number of weighted centroids, so its size
+        does not grow with the number of values added. Two sketches can be
+        merged without access to the original values.
+
+        Args:
+        - compression: Controls the number of centroids kept, and therefore
+        the accuracy of the quantile estimates.
+        """
+        self.compression = compression
+        self.means = np.empty(0, dtype=float)
+        self.weights = np.empty(0, dtype=float)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer: List[np.ndarray] = []
+        self._buffer_size = 0
+
+    @property
+    def count(self) -> float:
+        """Total number of values added to the sketch."""
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values: Iterable[float]) -> None:
+        """Add a batch of values to the sketch, ignoring non-finite values."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._buffer.append(values)
+        self._buffer_size += len(values)
+        if self._buffer_size >= 10 * self.compression:
+            self._flush()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Merge the centroids of another sketch into this one."""
+        other._flush()
+        if not len(other.weights):
+            return
+        self._flush()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile q (between 0 and 1)."""
+        self._flush()
+        if not len(self.weights):
+            return None
+        cumulative = np.cumsum(self.weights)
+        total = cumulative[-1]
+        centers = (cumulative - self.weights / 2) / total
+        xp = np.concatenate([[0.0], centers, [1.0]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q, xp, fp))
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffer_size = 0
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+
+        # Assign each centroid to a bucket of unit width on the k1 scale
+        # function, which keeps buckets small near the tails, then collapse
+        # every bucket into a single weighted centroid
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        buckets = np.floor(k)
+        starts = np.flatnonzero(np.diff(buckets, prepend=np.nan) != 0)
+
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def to_dict(self) -> Dict:
+        """Serialize the sketch to a JSON-compatible dictionary."""
+        self._flush()
+        return {
+            "compression": self.compression,
+            "min": self.min if np.isfinite(self.min) else None,
+            "max": self.max if np.isfinite(self.max) else None,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        """Create a sketch from a dictionary produced by to_dict."""
+        sketch = cls(data["compression"])
+        sketch.means = np.asarray(data["means"], dtype=float)
+        sketch.weights = np.asarray(data["weights"], dtype=float)
+        if data["min"] is not None:
+            sketch.min = float(data["min"])
+        if data["max"] is not None:
+            sketch.max = float(data["max"])
+        return sketch
+
+
+def _unit_key(unit: Optional[str]) -> str:
+    """Normalize a unit, so that a missing unit is an empty string."""
+    return "" if pd.isna(unit) else str(unit).strip()
+
+
+class CohortStats:
+    def __init__(self, compression: float = 100.0):
+        """
+        Initializes a collection of per-marker quantile sketches.
+
+        Values of a marker reported in different units, such as white cell
+        counts in x10E3/uL or /uL, are kept in separate sketches.
+
+        Args:
+        - compression: Compression used for every marker sketch.
+        """
+        self.compression = compression
+        self.sketches: Dict[Tuple[str, str], QuantileSketch] = {}
+
+    def update_from_frame(self, data: pd.DataFrame) -> None:
+        """Add every numeric value of a WellnessFX DataFrame to the sketches."""
+        values = pd.to_numeric(data[COLUMN_VALUE], errors="coerce")
+        names = data[COLUMN_MARKER_NAME].str.strip()
+        units = data[COLUMN_UNIT].map(_unit_key)
+        for key, marker_values in values.groupby([names, units]):
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch(self.compression)
+            self.sketches[key].update(marker_values.to_numpy())
+
+    def merge(self, other: "CohortStats") -> None:
+        """Merge the sketches of another cohort into this one."""
+        for key, sketch in other.sketches.items():
+            if key not in self.sketches:
+                self.sketches[key] = QuantileSketch(self.compression)
+            self.sketches[key].merge(sketch)
+
+    @property
+    def markers(self) -> List[str]:
+        """Names of the markers with at least one sketch."""
+        return sorted({marker_name for marker_name, _ in self.sketches})
+
+    def percentiles(
+        self,
+        marker_name: str,
+        unit: Optional[str],
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> Optional[Dict[float, float]]:
+        """
+        Estimate cohort percentiles for a marker.
+
+        Args:
+        - marker_name: Name of the biomarker.
+        - unit: Unit of the values the percentiles are compared with. Only
+        cohort values reported in the same unit are used.
+        - percentiles: Percentiles to estimate, between 0 and 100.
+
+        Returns:
+        - Dictionary mapping each percentile to its estimated value, or None
+        if the cohort has no values for the marker in that unit.
+        """
+        sketch = self.sketches.get((marker_name, _unit_key(unit)))
+        if sketch is None or not sketch.count:
+            return None
+        return {p: sketch.quantile(p / 100) for p in percentiles}
+
+    def save(self, path: str) -> None:
+        """Write the cohort sketches to a JSON file."""
+        data = {
+            "compression": self.compression,
+            "sketches": [
+                {
+                    "marker": marker_name,
+                    "unit": unit,
+                    "sketch": sketch.to_dict(),
+                }
+                for (marker_name, unit), sketch in self.sketches.items()
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str) -> "CohortStats":
+        """Read cohort sketches from a JSON file written by save."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "sketches" not in data:
+            raise ValueError(
+                f"{path} has no per-unit sketches, rebuild it with "
+                "build_cohort_stats.py"
+            )
+        cohort = cls(data["compression"])
+        for entry in data["sketches"]:
+            key = (entry["marker"], entry["unit"])
+            cohort.sketches[key] = QuantileSketch.from_dict(entry["sketch"])
+        return cohort
+
+
+def _sketch_csv_files(
+    csv_paths: Sequence[str], compression: float, engine: str = "pandas"
+) -> CohortStats:
+    """Stream a list of exports into a single set of sketches."""
+    cohort = CohortStats(compression)
+    for csv_path in csv_paths:
+        cohort.update_from_frame(
+            util.read_wellnessfx_csv(csv_path, engine=engine)
+        )
+    return cohort
+
+
+def build_cohort_stats(
+    csv_paths: Sequence[str],
+    workers: int = 1,
+    compression: float = 100.0,
+    engine: str = "pandas",
+) -> CohortStats:
+    """
+    Build cohort statistics from many WellnessFX exports.
+
+    Each export is read once and reduced into the sketches before the next
+    one is read, so raw values are never held for the whole cohort.
+
+    Args:
+    - csv_paths: Paths to the exported CSV files, typically one per patient.
+    - workers: Number of worker processes. The files are split between the
+    workers and their sketches are merged at the end.
+    - compression: Compression used for every marker sketch.
+    - engine: CSV parser to use, see utils.read_wellnessfx_csv.
+
+    Returns:
+    - CohortStats with one sketch per marker.
+    """
+    if workers <= 1 or len(csv_paths) <= 1:
+        return _sketch_csv_files(csv_paths, compression, engine)
+
+    chunks = [csv_paths[i::workers] for i in range(workers)]
+    chunks = [chunk for chunk in chunks if chunk]
+    cohort = CohortStats(compression)
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        for partial in executor.map(
+            _sketch_csv_files,
+            chunks,
+            [compression] * len(chunks),
+            [engine] * len(chunks),
+        ):
+            cohort.merge(partial)
+    return cohort
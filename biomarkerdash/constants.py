@@ -37,12 +37,17 @@ COLUMN_DRAW_DATE = "Draw Date"
 COLUMN_VALUE = "Value"
 COLUMN_MARKER_DESCRIPTION = "Marker Description"
 COLUMN_UNIT = "Units"
+COLUMN_SOURCE = "Source"
 
 # Colors for plotting
 COLOR_RED = "rgb(236, 2, 0)"
 COLOR_GREEN = "rgb(82, 182, 2)"
 COLOR_LINE = "rgba(0, 0, 0, 0.15)"
 COLOR_BG_OUTSIDE_REF_RANGE = "rgba(236,2,0,0.2)"
+COLOR_BG_REF_RANGE = "rgba(82,182,2,0.15)"
+COLOR_SPARKLINE = "rgba(0, 0, 0, 0.4)"
+COLOR_COHORT_BAND = "rgba(31,119,180,0.1)"
+COLOR_COHORT_MEDIAN = "rgba(31,119,180,0.6)"
 
 # HTML
 FOOTER_HTML = """
@@ -52,3 +57,5 @@ FOOTER_HTML = """
 </div></body></html>"
 """
 INDEX_PAGE_CATEGORY = "Cardiovascular Health"
+OUT_OF_RANGE_PAGE_TITLE = "Out of Range"
+DELTA_PAGE_TITLE = "Changes Since Last Draw"
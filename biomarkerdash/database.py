@@ -0,0 +1,273 @@
+# filename: database.py
+# SQLite store of biomarker results accumulated across imports
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import sqlite3
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import biomarkerdash.biomarker as bm
+import biomarkerdash.utils as util
+from biomarkerdash.constants import (
+    COLUMN_MARKER_NAME,
+    COLUMN_REFERENCE_RANGE,
+    COLUMN_DRAW_DATE,
+    COLUMN_VALUE,
+    COLUMN_MARKER_DESCRIPTION,
+    COLUMN_UNIT,
+    COLUMN_SOURCE,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    id INTEGER PRIMARY KEY,
+    patient TEXT NOT NULL,
+    source_path TEXT NOT NULL,
+    imported_at TEXT NOT NULL,
+    rows_read INTEGER NOT NULL,
+    rows_added INTEGER NOT NULL
+);
+-- The unique constraint doubles as the (patient, marker, draw date) index
+-- used by every query. Missing text fields are stored as empty strings so
+-- that they take part in the uniqueness check.
+CREATE TABLE IF NOT EXISTS results (
+    patient TEXT NOT NULL,
+    marker TEXT NOT NULL,
+    draw_date TEXT NOT NULL,
+    value NOT NULL,
+    unit TEXT NOT NULL,
+    reference_range TEXT NOT NULL,
+    description TEXT NOT NULL,
+    source TEXT NOT NULL,
+    import_id INTEGER NOT NULL REFERENCES imports (id),
+    UNIQUE (patient, marker, draw_date, value, unit, reference_range, source)
+);
+"""
+
+# Format of draw dates in WellnessFX exports
+_EXPORT_DATE_FORMAT = "%m/%d/%y"
+
+
+class ResultsDatabase:
+    def __init__(self, path: str):
+        """
+        Opens or creates a SQLite database of biomarker results.
+
+        New exports are appended to the database, skipping rows it already
+        holds, so a patient's complete history is kept even if a later
+        export leaves out older results. Every import is recorded along with
+        the number of rows it added, and each result keeps the id of the
+        import it came from.
+
+        Args:
+        - path: Path to the SQLite database file.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ResultsDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def import_frame(
+        self, data: pd.DataFrame, patient: str, source_path: str = ""
+    ) -> int:
+        """
+        Append the rows of an export to the database.
+
+        Args:
+        - data: DataFrame in the WellnessFX export format, as returned by
+        utils.read_wellnessfx_csv.
+        - patient: Identifier of the patient the export belongs to.
+        - source_path: Path of the imported file, kept as provenance.
+
+        Returns:
+        - int: Number of rows that weren't already in the database.
+        """
+
+        def text_column(column: str) -> pd.Series:
+            if column not in data.columns:
+                return pd.Series("", index=data.index)
+            return data[column].astype(object).where(data[column].notna(), "")
+
+        # Store numbers as numbers, so that e.g. "55" and "55.0" are
+        # recognized as the same value, and anything else as text
+        numeric = pd.to_numeric(data[COLUMN_VALUE], errors="coerce").astype(
+            float
+        )
+        values = numeric.astype(object).where(
+            numeric.notna(), data[COLUMN_VALUE].astype(str)
+        )
+        draw_dates = pd.to_datetime(
+            data[COLUMN_DRAW_DATE], format=_EXPORT_DATE_FORMAT
+        ).dt.strftime("%Y-%m-%d")
+
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO imports (patient, source_path, imported_at, "
+                "rows_read, rows_added) VALUES (?, ?, ?, ?, 0)",
+                (
+                    patient,
+                    source_path,
+                    datetime.now().isoformat(timespec="seconds"),
+                    len(data),
+                ),
+            )
+            import_id = cursor.lastrowid
+            records = zip(
+                [patient] * len(data),
+                text_column(COLUMN_MARKER_NAME).str.strip(),
+                draw_dates,
+                values,
+                text_column(COLUMN_UNIT),
+                text_column(COLUMN_REFERENCE_RANGE),
+                text_column(COLUMN_MARKER_DESCRIPTION),
+                text_column(COLUMN_SOURCE),
+                [import_id] * len(data),
+            )
+            changes_before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO results VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            rows_added = self.connection.total_changes - changes_before
+            self.connection.execute(
+                "UPDATE imports SET rows_added = ? WHERE id = ?",
+                (rows_added, import_id),
+            )
+        return rows_added
+
+    def import_csv(
+        self, csv_path: str, patient: str, engine: str = "pandas"
+    ) -> int:
+        """Append a WellnessFX export to the database, see import_frame."""
+        data = util.read_wellnessfx_csv(csv_path, engine=engine)
+        return self.import_frame(data, patient, source_path=csv_path)
+
+    def patients(self) -> List[str]:
+        """Return the identifiers of all patients in the database."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT patient FROM results ORDER BY patient"
+        )
+        return [patient for (patient,) in rows]
+
+    def imports(self, patient: Optional[str] = None) -> pd.DataFrame:
+        """Return the import history, optionally for a single patient."""
+        query = "SELECT * FROM imports"
+        params: Sequence = ()
+        if patient is not None:
+            query += " WHERE patient = ?"
+            params = (patient,)
+        return pd.read_sql_query(
+            query + " ORDER BY id", self.connection, params=params
+        )
+
+    def load_frame(
+        self,
+        patient: str,
+        markers: Optional[Sequence[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Query the results of a patient.
+
+        Args:
+        - patient: Identifier of the patient.
+        - markers: Optional marker names to restrict the results to.
+        - since: Optional first draw date to include, as YYYY-MM-DD.
+        - until: Optional last draw date to include, as YYYY-MM-DD.
+
+        Returns:
+        - DataFrame in the WellnessFX export format, sorted by marker and
+        draw date, that can be passed to utils.build_biomarkers.
+        """
+        query = (
+            "SELECT marker, draw_date, value, unit, reference_range, "
+            "description, source FROM results WHERE patient = ?"
+        )
+        params: List = [patient]
+        if markers is not None:
+            query += f" AND marker IN ({', '.join('?' * len(markers))})"
+            params.extend(markers)
+        if since is not None:
+            query += " AND draw_date >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND draw_date <= ?"
+            params.append(until)
+        query += " ORDER BY marker, draw_date"
+
+        data = pd.read_sql_query(query, self.connection, params=params)
+        data.columns = [
+            COLUMN_MARKER_NAME,
+            COLUMN_DRAW_DATE,
+            COLUMN_VALUE,
+            COLUMN_UNIT,
+            COLUMN_REFERENCE_RANGE,
+            COLUMN_MARKER_DESCRIPTION,
+            COLUMN_SOURCE,
+        ]
+        data[COLUMN_DRAW_DATE] = pd.to_datetime(
+            data[COLUMN_DRAW_DATE], format="%Y-%m-%d"
+        ).dt.strftime(_EXPORT_DATE_FORMAT)
+        text_columns = [
+            COLUMN_UNIT,
+            COLUMN_REFERENCE_RANGE,
+            COLUMN_MARKER_DESCRIPTION,
+            COLUMN_SOURCE,
+        ]
+        data[text_columns] = data[text_columns].replace("", np.nan)
+        return data
+
+    def load_biomarkers(
+        self,
+        patient: str,
+        markers: Optional[Sequence[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Dict[str, bm.Biomarker]:
+        """
+        Create the biomarkers of a patient from indexed queries, without
+        reparsing any export. See load_frame for the arguments.
+        """
+        return util.build_biomarkers(
+            self.load_frame(patient, markers, since, until)
+        )
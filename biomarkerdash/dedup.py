@@ -0,0 +1,233 @@
+# filename: dedup.py
+# Hash-based deduplication of overlapping exports
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Sequence, Tuple
+
+import biomarkerdash.utils as util
+from biomarkerdash.constants import (
+    COLUMN_MARKER_NAME,
+    COLUMN_DRAW_DATE,
+    COLUMN_VALUE,
+    COLUMN_UNIT,
+    COLUMN_SOURCE,
+)
+
+# Extra column identifying the export a conflicting row came from
+COLUMN_EXPORT = "Export"
+
+
+def _normalized_column(data: pd.DataFrame, column: str) -> pd.Series:
+    """Return a column as plain strings, with missing values as ""."""
+    if column not in data.columns:
+        return pd.Series("", index=data.index, dtype=object)
+    return (
+        data[column].astype(object).where(data[column].notna(), "").astype(str)
+    )
+
+
+def _hash_columns(columns: Sequence[pd.Series]) -> np.ndarray:
+    """Hash rows made of the given columns into uint64 values."""
+    return pd.util.hash_pandas_object(
+        pd.concat(columns, axis=1, ignore_index=True), index=False
+    ).to_numpy()
+
+
+class ExportDeduplicator:
+    def __init__(self):
+        """
+        Initializes a deduplicator for rows streamed from many exports.
+
+        Rows are identified by a hash of their marker, draw date, value, unit
+        and source, so only 64-bit hashes of the rows seen so far are kept
+        in memory, not the rows themselves. Exact duplicates are dropped,
+        and rows that report a different value or unit for a marker on a
+        draw date already seen are kept but flagged as conflicts.
+        """
+        self._seen_rows = np.empty(0, dtype=np.uint64)
+        self._seen_dates = pd.Series(dtype=np.uint64)
+        self._conflicts = []
+        self.stats: Dict[str, int] = {
+            "rows_read": 0,
+            "duplicates_removed": 0,
+            "conflicts": 0,
+        }
+
+    @property
+    def conflicts(self) -> pd.DataFrame:
+        """Rows with a value that conflicts with an earlier row."""
+        if not self._conflicts:
+            return pd.DataFrame(
+                columns=[
+                    COLUMN_MARKER_NAME,
+                    COLUMN_DRAW_DATE,
+                    COLUMN_VALUE,
+                    COLUMN_UNIT,
+                    COLUMN_SOURCE,
+                    COLUMN_EXPORT,
+                ]
+            )
+        return pd.concat(self._conflicts, ignore_index=True)
+
+    def add(self, data: pd.DataFrame, export_name: str = "") -> pd.DataFrame:
+        """
+        Remove the rows of an export that have already been seen.
+
+        Args:
+        - data: DataFrame in the WellnessFX export format.
+        - export_name: Name of the export, reported with conflicting rows.
+
+        Returns:
+        - DataFrame with the rows of data that weren't seen before.
+        """
+        self.stats["rows_read"] += len(data)
+        if data.empty:
+            return data
+
+        marker = _normalized_column(data, COLUMN_MARKER_NAME).str.strip()
+        draw_date = _normalized_column(data, COLUMN_DRAW_DATE)
+        unit = _normalized_column(data, COLUMN_UNIT)
+        source = _normalized_column(data, COLUMN_SOURCE)
+
+        # Compare numbers by value, so that e.g. "55" and 55.0 match
+        numeric = pd.to_numeric(data[COLUMN_VALUE], errors="coerce").astype(
+            float
+        )
+        value = numeric.astype(str).where(
+            numeric.notna(), _normalized_column(data, COLUMN_VALUE)
+        )
+
+        row_hashes = _hash_columns([marker, draw_date, value, unit, source])
+        duplicate = pd.Series(row_hashes).duplicated().to_numpy() | np.isin(
+            row_hashes, self._seen_rows
+        )
+        self.stats["duplicates_removed"] += int(duplicate.sum())
+        self._seen_rows = np.union1d(self._seen_rows, row_hashes)
+
+        unique = data[~duplicate]
+        date_hashes = pd.Series(
+            _hash_columns([marker, draw_date])[~duplicate], index=unique.index
+        )
+        value_hashes = pd.Series(
+            _hash_columns([value, unit])[~duplicate], index=unique.index
+        )
+
+        # A row conflicts if its marker and draw date were seen with another
+        # value, either in an earlier export or earlier in this one
+        first_value = value_hashes.groupby(date_hashes).transform("first")
+        earlier_value = self._seen_dates.reindex(date_hashes.to_numpy())
+        conflict = (value_hashes != first_value).to_numpy() | (
+            earlier_value.notna().to_numpy()
+            & (earlier_value.to_numpy() != value_hashes.to_numpy())
+        )
+
+        if conflict.any():
+            conflicts = pd.DataFrame(
+                {
+                    COLUMN_MARKER_NAME: marker[~duplicate][conflict],
+                    COLUMN_DRAW_DATE: draw_date[~duplicate][conflict],
+                    COLUMN_VALUE: value[~duplicate][conflict],
+                    COLUMN_UNIT: unit[~duplicate][conflict],
+                    COLUMN_SOURCE: source[~duplicate][conflict],
+                    COLUMN_EXPORT: export_name,
+                }
+            )
+            self._conflicts.append(conflicts)
+            self.stats["conflicts"] += len(conflicts)
+
+        new_dates = ~date_hashes.duplicated() & ~date_hashes.isin(
+            self._seen_dates.index
+        )
+        self._seen_dates = pd.concat(
+            [
+                self._seen_dates,
+                pd.Series(
+                    value_hashes[new_dates].to_numpy(),
+                    index=date_hashes[new_dates].to_numpy(),
+                ),
+            ]
+        )
+        return unique
+
+
+def iter_deduplicated_exports(
+    csv_paths: Sequence[str],
+    deduplicator: ExportDeduplicator,
+    engine: str = "pandas",
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Read several exports one at a time, streaming them through a deduplicator.
+
+    Each export is read and deduplicated in turn, so only the rows of the
+    current export are kept in memory.
+
+    Args:
+    - csv_paths: Paths to the exported CSV files, in order of preference.
+    - deduplicator: ExportDeduplicator collecting the conflicts and
+    statistics across all exports.
+    - engine: CSV parser to use, see utils.read_wellnessfx_csv.
+
+    Returns:
+    - Iterator of the path of each export and its rows that weren't seen in
+    an earlier export.
+    """
+    for csv_path in csv_paths:
+        data = util.read_wellnessfx_csv(csv_path, engine=engine)
+        yield csv_path, deduplicator.add(data, csv_path)
+
+
+def read_deduplicated_exports(
+    csv_paths: Sequence[str], engine: str = "pandas"
+) -> Tuple[pd.DataFrame, ExportDeduplicator]:
+    """
+    Read several exports, streaming them through an ExportDeduplicator.
+
+    Each export is read and deduplicated in turn, so only the rows that are
+    new are kept in memory.
+
+    Args:
+    - csv_paths: Paths to the exported CSV files, in order of preference.
+    - engine: CSV parser to use, see utils.read_wellnessfx_csv.
+
+    Returns:
+    - Tuple of the combined unique rows, and the deduplicator holding the
+    conflicts and statistics.
+    """
+    deduplicator = ExportDeduplicator()
+    frames = [
+        unique
+        for _, unique in iter_deduplicated_exports(
+            csv_paths, deduplicator, engine=engine
+        )
+    ]
+    return pd.concat(frames, ignore_index=True), deduplicator
@@ -0,0 +1,212 @@
+# filename: derived.py
+# Biomarkers calculated from formulas over other biomarkers
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import re
+import numpy as np
+import pandas as pd
+import yaml
+from typing import Dict, List
+
+import biomarkerdash.biomarker as bm
+import biomarkerdash.utils as util
+from biomarkerdash.constants import COLUMN_DRAW_DATE, COLUMN_VALUE
+
+# Marker names in a formula, either quoted in backticks or plain words
+_NAME_PATTERN = re.compile(r"`([^`]+)`|\b([A-Za-z_]\w*)\b")
+
+
+class DerivedMarker:
+    def __init__(
+        self,
+        name: str,
+        formula: str,
+        unit: str = "",
+        reference_range: str = "",
+        description: str = "",
+    ):
+        """
+        Initializes the definition of a derived biomarker.
+
+        Args:
+        - name: Name of the derived biomarker.
+        - formula: pandas eval expression over the names of other
+        biomarkers, e.g. "`Total Cholesterol` / HDL".
+        - unit: Unit of the derived values.
+        - reference_range: Reference range in the WellnessFX export format.
+        - description: Description for the biomarker.
+        """
+        self.name = name
+        self.formula = formula
+        self.unit = unit
+        self.ref_range = (
+            util.parse_ref_range(reference_range)
+            if reference_range
+            else (None, None)
+        )
+        self.description = description
+        # Names referenced by the formula, which may also include functions
+        # such as sqrt that pandas eval provides
+        self.inputs: List[str] = list(
+            dict.fromkeys(
+                quoted or word
+                for quoted, word in _NAME_PATTERN.findall(formula)
+            )
+        )
+
+    def compute(self, biomarkers: Dict[str, bm.Biomarker]) -> pd.DataFrame:
+        """
+        Evaluate the formula on every draw date shared by its inputs.
+
+        The numeric history of each input is indexed by draw date, and the
+        inputs are aligned with a single inner join before the formula is
+        evaluated on all dates at once.
+
+        Args:
+        - biomarkers: Dictionary mapping marker names to Biomarker objects.
+
+        Returns:
+        - History DataFrame with draw dates and derived values, empty if an
+        input is missing or no draw date has every input.
+        """
+        columns = {}
+        for name in self.inputs:
+            if name not in biomarkers:
+                continue
+            history = biomarkers[name].history
+            values = pd.Series(
+                pd.to_numeric(history[COLUMN_VALUE], errors="coerce")
+                .astype(float)
+                .to_numpy(),
+                index=pd.to_datetime(history[COLUMN_DRAW_DATE]),
+            ).dropna()
+            # Use the last value reported for a draw date
+            columns[name] = values.groupby(level=0).last()
+
+        history = pd.DataFrame(columns=[COLUMN_DRAW_DATE, COLUMN_VALUE])
+        if not columns:
+            return history
+        aligned = pd.concat(columns, axis=1, join="inner")
+        try:
+            values = aligned.eval(self.formula)
+        except pd.errors.UndefinedVariableError:
+            return history
+        values = pd.Series(values, index=aligned.index, dtype=float)
+        values = values[np.isfinite(values)].sort_index()
+        history[COLUMN_DRAW_DATE] = values.index
+        history[COLUMN_VALUE] = values.to_numpy()
+        return history
+
+
+def load_derived_markers(filename: str) -> List[DerivedMarker]:
+    """
+    Load derived biomarker definitions from a YAML file.
+
+    Args:
+    - filename: YAML file mapping each derived biomarker name to its
+    formula, and optionally its unit, reference_range and description.
+
+    Returns:
+    - List of derived biomarker definitions, in file order.
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        definitions = yaml.safe_load(f) or {}
+    derived_markers = []
+    for name, definition in definitions.items():
+        if "formula" not in definition:
+            raise ValueError(f"Derived biomarker {name} has no formula")
+        derived_markers.append(DerivedMarker(name, **definition))
+    return derived_markers
+
+
+def compute_derived_markers(
+    biomarkers: Dict[str, bm.Biomarker],
+    derived_markers: List[DerivedMarker],
+) -> Dict[str, bm.Biomarker]:
+    """
+    Create Biomarker objects for the derived biomarkers.
+
+    Derived biomarkers are computed in order, so a formula can use an
+    earlier derived biomarker. When the lab reported a biomarker on some
+    draw dates, its values are kept, and the derived values only fill in the
+    draw dates it didn't report.
+
+    Args:
+    - biomarkers: Dictionary mapping marker names to Biomarker objects.
+    - derived_markers: Definitions of the derived biomarkers.
+
+    Returns:
+    - Dictionary mapping the names of the derived biomarkers that gained at
+    least one value to new Biomarker objects, which replace the reported
+    ones when merged into biomarkers.
+    """
+    available = dict(biomarkers)
+    derived: Dict[str, bm.Biomarker] = {}
+    for definition in derived_markers:
+        history = definition.compute(available)
+        reported = available.get(definition.name)
+        if reported is not None:
+            reported_dates = pd.to_datetime(reported.history[COLUMN_DRAW_DATE])
+            history = history[~history[COLUMN_DRAW_DATE].isin(reported_dates)]
+        if history.empty:
+            continue
+
+        if reported is None:
+            marker = bm.Biomarker(
+                definition.name,
+                definition.description,
+                definition.unit,
+                definition.ref_range,
+                history,
+            )
+        else:
+            marker = bm.Biomarker(
+                reported.name,
+                reported.description,
+                reported.unit,
+                (
+                    reported.ref_range
+                    if reported.ref_range != (None, None)
+                    else definition.ref_range
+                ),
+                pd.concat(
+                    [
+                        reported.history.assign(
+                            **{COLUMN_DRAW_DATE: reported_dates}
+                        ),
+                        history,
+                    ],
+                    ignore_index=True,
+                ),
+            )
+        available[definition.name] = marker
+        derived[definition.name] = marker
+    return derived
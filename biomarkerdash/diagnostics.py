@@ -0,0 +1,151 @@
+# filename: diagnostics.py
+# Aggregated diagnostics reported while loading and plotting biomarkers
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+from typing import Dict, List, Tuple
+
+# Kinds of issues, with the template used to describe each occurrence
+UNIT_CHANGE = "unit change"
+RANGE_CORRECTION = "range correction"
+RANGE_CONFLICT = "range conflict"
+RANGE_PARSE_ERROR = "range parse error"
+NON_NUMERIC_VALUES = "non-numeric values"
+CONFLICTING_RESULT = "conflicting result"
+MESSAGES = {
+    UNIT_CHANGE: "unit changed from {} to {}",
+    RANGE_CORRECTION: "reference range ({}, {}) {} corrected to ({}, {})",
+    RANGE_CONFLICT: "reference range on {} changed from {}-{} to {}-{}",
+    RANGE_PARSE_ERROR: "couldn't parse reference range '{}' on {}",
+    NON_NUMERIC_VALUES: "not plotted, values aren't all numeric",
+    CONFLICTING_RESULT: "another value {} {} on {} in {}",
+}
+
+
+class Diagnostics:
+    def __init__(self, verbose: bool = False, max_examples: int = 3):
+        """
+        Initializes a collector of issues found in the data.
+
+        Issues are counted per (kind, marker), and only the first few
+        occurrences of each are formatted and kept as examples, so
+        reporting an issue that is repeated on every row is cheap.
+
+        Args:
+        - verbose: Print every occurrence as it is reported.
+        - max_examples: Number of occurrences kept per (kind, marker).
+        """
+        self.verbose = verbose
+        self.max_examples = max_examples
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.examples: Dict[Tuple[str, str], List[str]] = {}
+
+    def report(self, kind: str, marker: str, *details) -> None:
+        """
+        Record an occurrence of an issue.
+
+        Args:
+        - kind: Kind of issue, one of the keys of MESSAGES.
+        - marker: Name of the biomarker affected.
+        - details: Values filling in the message template of the kind.
+        """
+        key = (kind, marker)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        if count < self.max_examples or self.verbose:
+            message = MESSAGES[kind].format(*details)
+            if count < self.max_examples:
+                self.examples.setdefault(key, []).append(message)
+            if self.verbose:
+                print(f"{kind} for {marker}: {message}")
+
+    @property
+    def total(self) -> int:
+        """Total number of occurrences reported."""
+        return sum(self.counts.values())
+
+    def clear(self) -> None:
+        """Forget every issue reported so far."""
+        self.counts.clear()
+        self.examples.clear()
+
+    def to_dict(self) -> Dict:
+        """Summarize the issues as a JSON-compatible dictionary."""
+        return {
+            "total": self.total,
+            "issues": [
+                {
+                    "kind": kind,
+                    "marker": marker,
+                    "count": count,
+                    "examples": self.examples.get((kind, marker), []),
+                }
+                for (kind, marker), count in sorted(self.counts.items())
+            ],
+        }
+
+    def summary(self) -> str:
+        """Summarize the issues as text, one line per (kind, marker)."""
+        if not self.counts:
+            return "No issues found in the data"
+        lines = [f"{self.total} issues found in the data:"]
+        for (kind, marker), count in sorted(self.counts.items()):
+            example = self.examples[(kind, marker)][0]
+            times = "once" if count == 1 else f"{count} times"
+            lines.append(f"- {kind} for {marker}, {times}: {example}")
+        return "\n".join(lines)
+
+    def save(self, path: str) -> None:
+        """Write the summary returned by to_dict to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# Collector used by the module-level report function
+_collector = Diagnostics()
+
+
+def get_collector() -> Diagnostics:
+    """Return the collector issues are currently reported to."""
+    return _collector
+
+
+def set_collector(collector: Diagnostics) -> Diagnostics:
+    """Report issues to the given collector, returning the previous one."""
+    global _collector
+    previous = _collector
+    _collector = collector
+    return previous
+
+
+def report(kind: str, marker: str, *details) -> None:
+    """Report an issue to the current collector, see Diagnostics.report."""
+    _collector.report(kind, marker, *details)
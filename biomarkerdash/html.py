@@ -31,16 +31,28 @@
 # POSSIBILITY OF SUCH DAMAGE.
 
 import os
-from typing import List, Dict
+import pandas as pd
+from typing import List, Dict, Optional
 
+import biomarkerdash.analytics as analytics
 import biomarkerdash.utils as util
-from biomarkerdash.constants import FOOTER_HTML
+from biomarkerdash.constants import (
+    COLUMN_DRAW_DATE,
+    COLUMN_VALUE,
+    DELTA_PAGE_TITLE,
+    FOOTER_HTML,
+    OUT_OF_RANGE_PAGE_TITLE,
+)
+from biomarkerdash.output import write_file_atomic
+from biomarkerdash.snapshot import RANGE_ENTERED, RANGE_LEFT
+from biomarkerdash.sparkline import sparkline_svg
 
 
 def combine_html_files(
     category: str,
     plot_html_list: List[str],
     output_directory: str,
+    writer=None,
 ) -> str:
     """
     Combine multiple HTML sections related to a category into a single page.
@@ -49,6 +61,8 @@ def combine_html_files(
     - category (str): Name of the biomarker category.
     - plot_html_list (List[str]): List of HTML contents to combine.
     - output_directory (str): Directory to save the output file.
+    - writer: Optional writer, such as output.ContentStore, used to save the
+    page instead of writing it directly.
 
     Returns:
     - str: Name of the output file.
@@ -65,10 +79,15 @@ def combine_html_files(
     sanitized_filename = util.generate_filename(category)
     output_path = os.path.join(output_directory, sanitized_filename)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(combined_html)
-
-    print(f"Wrote {category} page to {output_path}")
+    if writer is not None:
+        # The writer may save the page later, so only report it as queued
+        writer.write_text(output_path, combined_html)
+        print(f"Queued {category} page for {output_path}")
+    else:
+        # Replace the file instead of writing through it, as it may be a
+        # link to an object shared with other pages
+        write_file_atomic(output_path, combined_html.encode("utf-8"))
+        print(f"Wrote {category} page to {output_path}")
     return output_path
 
 
@@ -82,6 +101,9 @@ def create_header_toc(
     category_files: Dict[str, str],
     css_filepath: str,
     current_category: str = None,
+    summary_files: Optional[Dict[str, str]] = None,
+    css_href: Optional[str] = None,
+    plotlyjs_src: Optional[str] = None,
 ) -> str:
     """
     Generate an HTML header and table of contents with links to category pages.
@@ -93,23 +115,35 @@ def create_header_toc(
         stylesheet.
         current_category (str): Name of the current category. If provided, this
         category will be bold in the TOC to indicate it's the current page.
+        summary_files (Dict[str, str]): A mapping of summary page titles, such
+        as the out of range overview, to their file names. These are listed
+        above the categories.
+        css_href (str): If provided, the page links to this stylesheet instead
+        of inlining the content of css_filepath.
+        plotlyjs_src (str): If provided, the page loads plotly.js from this
+        location, for plots generated without it.
 
     Returns:
         str: HTML content with headers and table of contents.
     """
-    css_content = load_css(css_filepath)
-
     # Header
     header_html = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;700&display=swap" rel="stylesheet">
-        <style>
     """
-    header_html += css_content
+    if css_href:
+        header_html += f'<link href="{css_href}" rel="stylesheet">'
+    else:
+        header_html += "<style>"
+        header_html += load_css(css_filepath)
+        header_html += "</style>"
+    if plotlyjs_src:
+        header_html += (
+            f'<script src="{plotlyjs_src}" charset="utf-8"></script>'
+        )
     header_html += """
-        </style>
         <meta charset="UTF-8">
         <meta http-equiv="X-UA-Compatible" content="IE=edge">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
@@ -120,7 +154,16 @@ def create_header_toc(
     """
 
     # Sidebar TOC
-    sidebar_html = '<div class="sidebar"><h2>Biomarker Dashboard</h2><ul>'
+    sidebar_html = '<div class="sidebar"><h2>Biomarker Dashboard</h2>'
+    if summary_files:
+        sidebar_html += '<ul class="summary-pages">'
+        for title, filename in summary_files.items():
+            if title == current_category:
+                sidebar_html += f'<li><a href="{filename}" style="font-weight: bold;">{title}</a></li>'
+            else:
+                sidebar_html += f'<li><a href="{filename}">{title}</a></li>'
+        sidebar_html += "</ul>"
+    sidebar_html += "<ul>"
     for category, filename in category_files.items():
         if category == current_category:
             sidebar_html += f'<li><a href="{filename}" style="font-weight: bold;">{category}</a></li>'
@@ -134,3 +177,174 @@ def create_header_toc(
     final_html = header_html + sidebar_html + main_content_html
 
     return final_html
+
+
+def _format_value(value: float) -> str:
+    return "" if pd.isna(value) else f"{value:g}"
+
+
+def _format_range(min_val: float, max_val: float) -> str:
+    if pd.isna(min_val):
+        return f"&lt;{_format_value(max_val)}"
+    if pd.isna(max_val):
+        return f"&gt;{_format_value(min_val)}"
+    return f"{_format_value(min_val)}-{_format_value(max_val)}"
+
+
+def _trend_arrow(change: float) -> str:
+    if pd.isna(change) or change == 0:
+        return "&rarr;"
+    return "&uarr;" if change > 0 else "&darr;"
+
+
+def create_out_of_range_html(
+    data: pd.DataFrame,
+    marker_links: Optional[Dict[str, str]] = None,
+    window: int = 3,
+) -> str:
+    """
+    Generate an HTML summary of every marker whose latest value is outside
+    its reference range.
+
+    The summary is computed in one pass over all measurements and uses small
+    inline SVG sparklines instead of full interactive plots.
+
+    Args:
+        data (pd.DataFrame): Long table of all measurements, as built by
+        analytics.biomarkers_to_frame.
+        marker_links (Dict[str, str]): Optional mapping of marker names to the
+        page showing their full plot.
+        window (int): Number of recent draws used for the rolling mean.
+
+    Returns:
+        str: HTML content for the main section of the summary page.
+    """
+    trends = analytics.compute_trends_from_frame(data, window=window)
+    flagged = trends[
+        trends["status"].isin([analytics.STATUS_LOW, analytics.STATUS_HIGH])
+    ].sort_values("latest_date", ascending=False, kind="stable")
+    marker_links = marker_links or {}
+
+    html_content = f'<h2 id="{OUT_OF_RANGE_PAGE_TITLE}">'
+    html_content += f"{OUT_OF_RANGE_PAGE_TITLE}</h2>"
+    if flagged.empty:
+        return (
+            html_content
+            + "<p>All markers are within their reference ranges.</p>"
+        )
+
+    flagged_data = data[data[analytics.MARKER].isin(flagged.index)]
+    flagged_values = flagged_data[COLUMN_VALUE].to_numpy()
+    flagged_dates = flagged_data[COLUMN_DRAW_DATE].to_numpy()
+    rows_by_marker = flagged_data.groupby(analytics.MARKER).indices
+
+    html_content += (
+        '<table class="overview"><tr><th>Marker</th><th>Latest</th>'
+        "<th>Reference Range</th><th>Status</th><th>Since Previous</th>"
+        "<th>Trend / Year</th><th>Last In Range</th><th>History</th></tr>"
+    )
+    for marker_name, row in flagged.iterrows():
+        link = marker_links.get(marker_name)
+        name_html = (
+            f'<a href="{link}">{marker_name}</a>' if link else marker_name
+        )
+        rows = rows_by_marker[marker_name]
+        sparkline = sparkline_svg(
+            flagged_dates[rows],
+            flagged_values[rows],
+            (
+                None if pd.isna(row["ref_min"]) else row["ref_min"],
+                None if pd.isna(row["ref_max"]) else row["ref_max"],
+            ),
+        )
+        last_in_range = (
+            "never"
+            if pd.isna(row["last_in_range_date"])
+            else row["last_in_range_date"].strftime("%Y-%m-%d")
+        )
+        html_content += (
+            f"<tr><td>{name_html}</td>"
+            f'<td>{_format_value(row["latest_value"])} {row["unit"]}<br>'
+            f'<sup>{row["latest_date"].strftime("%Y-%m-%d")}</sup></td>'
+            f'<td>{_format_range(row["ref_min"], row["ref_max"])}</td>'
+            f'<td class="status-{row["status"]}">{row["status"]}</td>'
+            f'<td>{_trend_arrow(row["change"])} '
+            f'{_format_value(row["change"])}</td>'
+            f'<td>{_trend_arrow(row["slope_per_year"])} '
+            f'{_format_value(round(row["slope_per_year"], 3))}</td>'
+            f"<td>{last_in_range}</td>"
+            f"<td>{sparkline}</td></tr>"
+        )
+    html_content += "</table>"
+
+    return html_content
+
+
+def create_delta_html(
+    delta: pd.DataFrame, marker_links: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Generate an HTML summary of the markers with new results since the
+    previous build.
+
+    Args:
+        delta (pd.DataFrame): Changes between two snapshots, as returned by
+        snapshot.diff_snapshots.
+        marker_links (Dict[str, str]): Optional mapping of marker names to the
+        page showing their full plot.
+
+    Returns:
+        str: HTML content for the main section of the summary page.
+    """
+    marker_links = marker_links or {}
+
+    html_content = f'<h2 id="{DELTA_PAGE_TITLE}">{DELTA_PAGE_TITLE}</h2>'
+    if delta.empty:
+        return html_content + "<p>No new results since the last draw.</p>"
+
+    for range_change in [RANGE_ENTERED, RANGE_LEFT]:
+        names = delta.index[delta["range_change"] == range_change]
+        if len(names):
+            html_content += (
+                f"<p>{range_change.capitalize()}: {', '.join(names)}.</p>"
+            )
+
+    html_content += (
+        '<table class="overview"><tr><th>Marker</th><th>Latest</th>'
+        "<th>Previous</th><th>Change</th><th>Reference Range</th>"
+        "<th>Status</th></tr>"
+    )
+    for marker_name, row in delta.iterrows():
+        link = marker_links.get(marker_name)
+        name_html = (
+            f'<a href="{link}">{marker_name}</a>' if link else marker_name
+        )
+        if pd.isna(row["previous_date"]):
+            previous = row["kind"]
+            change = ""
+        else:
+            previous = (
+                f'{_format_value(row["previous_value"])} {row["unit"]}<br>'
+                f'<sup>{row["previous_date"].strftime("%Y-%m-%d")}</sup>'
+            )
+            change = (
+                f'{_trend_arrow(row["change"])} '
+                f'{_format_value(round(row["change"], 3))}'
+            )
+            if not pd.isna(row["percent_change"]):
+                change += f' ({row["percent_change"]:+.0f}%)'
+        status = row["status"]
+        if row["range_change"]:
+            status += f'<br><sup>{row["range_change"]}</sup>'
+        html_content += (
+            f"<tr><td>{name_html}</td>"
+            f'<td>{_format_value(row["latest_value"])} {row["unit"]}<br>'
+            f'<sup>{row["latest_date"].strftime("%Y-%m-%d")}</sup></td>'
+            f"<td>{previous}</td>"
+            f"<td>{change}</td>"
+            f'<td>{_format_range(row["ref_min"], row["ref_max"])}</td>'
+            f'<td class="status-{row["status"]}">{status}</td></tr>'
+        )
+    html_content += "</table>"
+
+    return html_content
@@ -0,0 +1,268 @@
+# filename: output.py
+# Content-addressed storage for generated dashboard files
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+# Ways a page can be linked to the stored object holding its content
+LINK_HARDLINK = "hardlink"
+LINK_SYMLINK = "symlink"
+LINK_COPY = "copy"
+
+
+def write_file_atomic(path: str, content: bytes) -> None:
+    """Write content to a temporary file and rename it over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        # Temporary files are only readable by their owner, give the output
+        # the usual permissions of a newly created file instead
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class ContentStore:
+    def __init__(self, root: str, link_mode: str = LINK_HARDLINK):
+        """
+        Initializes a content-addressed store for generated files.
+
+        Every file written through the store is saved once under the SHA-256
+        hash of its content, and the requested output path is linked to that
+        object. Identical pages, plots and assets, whether repeated within a
+        build, across builds or across patients, take up disk space and
+        write I/O only once.
+
+        Args:
+        - root: Directory holding the stored objects. It can be shared by
+        many builds, but must be on the same file system as the outputs for
+        hard links to work.
+        - link_mode: One of "hardlink", "symlink" or "copy". Hard links
+        fall back to symbolic links, and symbolic links to copies, when the
+        file system doesn't support them.
+        """
+        if link_mode not in (LINK_HARDLINK, LINK_SYMLINK, LINK_COPY):
+            raise ValueError(f"Unsupported link mode: {link_mode}")
+        self.root = root
+        self.link_mode = link_mode
+        self.stats: Dict[str, int] = {
+            "objects_written": 0,
+            "bytes_written": 0,
+            "objects_reused": 0,
+            "bytes_deduplicated": 0,
+        }
+        os.makedirs(root, exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        """Return the path of the stored object for a content hash."""
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, content: bytes) -> str:
+        """
+        Store content if it isn't stored yet.
+
+        Args:
+        - content: Bytes to store.
+
+        Returns:
+        - str: SHA-256 hex digest identifying the stored object.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self.object_path(digest)
+        if os.path.exists(object_path):
+            self.stats["objects_reused"] += 1
+            self.stats["bytes_deduplicated"] += len(content)
+        else:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            write_file_atomic(object_path, content)
+            self.stats["objects_written"] += 1
+            self.stats["bytes_written"] += len(content)
+        return digest
+
+    def write_text(self, path: str, text: str) -> None:
+        """Store text and link the output path to the stored object."""
+        digest = self.put(text.encode("utf-8"))
+        self.link(digest, path)
+
+    def link(self, digest: str, path: str) -> None:
+        """Point an output path at a stored object."""
+        object_path = self.object_path(digest)
+        if os.path.exists(path) and os.path.samefile(path, object_path):
+            return
+
+        # Link to a temporary name first, so the output path is replaced
+        # atomically and never modified in place, since the object it points
+        # to may be shared with other outputs
+        directory = os.path.dirname(os.path.abspath(path))
+        temp_path = os.path.join(directory, f".tmp-{digest}")
+        if os.path.lexists(temp_path):
+            os.unlink(temp_path)
+
+        mode = self.link_mode
+        if mode == LINK_HARDLINK:
+            try:
+                os.link(object_path, temp_path)
+            except OSError:
+                mode = LINK_SYMLINK
+        if mode == LINK_SYMLINK:
+            try:
+                os.symlink(
+                    os.path.relpath(os.path.abspath(object_path), directory),
+                    temp_path,
+                )
+            except OSError:
+                mode = LINK_COPY
+        if mode == LINK_COPY:
+            shutil.copyfile(object_path, temp_path)
+
+        os.replace(temp_path, path)
+
+
+class BackgroundWriter:
+    def __init__(self, max_queue_size: int = 16, backend=None):
+        """
+        Initializes a writer that saves files on a background thread.
+
+        Rendering can continue while previously submitted files are still
+        being written, which keeps the CPU busy on slow or network-mounted
+        output volumes. The queue is bounded, so a producer that outpaces the
+        disk blocks instead of holding every pending page in memory.
+
+        Args:
+        - max_queue_size: Maximum number of files waiting to be written.
+        - backend: Optional writer, such as ContentStore, that performs the
+        writes. By default each file is written to a temporary file and
+        renamed over its output path.
+        """
+        self.backend = backend
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "writes": 0,
+            "characters": 0,
+            "max_queue_depth": 0,
+            "total_write_seconds": 0.0,
+            "max_write_seconds": 0.0,
+        }
+        self._thread = threading.Thread(
+            target=self._run, name="BackgroundWriter", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write_text(self, path: str, text: str) -> None:
+        """Queue text to be written to a path, blocking if the queue is full."""
+        self._raise_error()
+        self._queue.put((path, text))
+        with self._lock:
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._queue.qsize()
+            )
+
+    def flush(self) -> None:
+        """Wait until every queued file has been written."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write the remaining files and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the current queue depth and write statistics.
+
+        Returns:
+        - Dict[str, float]: Number of writes and characters written, current and
+        maximum queue depth, and total, mean and maximum write latency in
+        seconds.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["mean_write_seconds"] = (
+            stats["total_write_seconds"] / stats["writes"]
+            if stats["writes"]
+            else 0.0
+        )
+        return stats
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is not None:
+                    # Drain the queue without writing after a failure
+                    continue
+                path, text = item
+                start = time.perf_counter()
+                if self.backend is not None:
+                    self.backend.write_text(path, text)
+                else:
+                    write_file_atomic(path, text.encode("utf-8"))
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self._stats["writes"] += 1
+                    self._stats["characters"] += len(text)
+                    self._stats["total_write_seconds"] += elapsed
+                    self._stats["max_write_seconds"] = max(
+                        self._stats["max_write_seconds"], elapsed
+                    )
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
@@ -30,18 +30,25 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import base64
 import numpy as np
 import plotly.graph_objects as go
-import plotly.offline as pyo
-from typing import Optional, Tuple
+import plotly.io as pio
+from typing import Dict, Optional, Tuple
 
 import biomarkerdash.biomarker as bm
+import biomarkerdash.diagnostics as diag
+from biomarkerdash.analytics import range_status
+from biomarkerdash.output import write_file_atomic
+import biomarkerdash.utils as util
 
 from biomarkerdash.constants import (
     COLOR_RED,
     COLOR_GREEN,
     COLOR_LINE,
     COLOR_BG_OUTSIDE_REF_RANGE,
+    COLOR_COHORT_BAND,
+    COLOR_COHORT_MEDIAN,
 )
 
 
@@ -71,53 +78,184 @@ def determine_color(
         return "grey"
 
 
-def plot_history(marker: bm.Biomarker, save_to: str) -> None:
+def typed_array(values: np.ndarray) -> Dict[str, str]:
+    """
+    Encode an array in the base64 typed array format read by plotly.js.
+
+    Parameters:
+    - values (np.ndarray): Array of a numeric dtype supported by plotly.js,
+    such as float64 or int8.
+
+    Returns:
+    - dict: The dtype code and the base64 encoded little-endian bytes.
+    """
+    values = np.ascontiguousarray(values)
+    values = values.astype(values.dtype.newbyteorder("<"), copy=False)
+    return {
+        "dtype": values.dtype.str.lstrip("<|"),
+        "bdata": base64.b64encode(values.tobytes()).decode("ascii"),
+    }
+
+
+def cohort_band_shapes(percentiles: Dict[float, float]) -> list:
+    """
+    Create plot shapes showing where the cohort values fall.
+
+    Parameters:
+    - percentiles (Dict[float, float]): Mapping of percentiles to values, as
+    returned by CohortStats.percentiles.
+
+    Returns:
+    - list: Shapes shading the outer and inner percentile bands, and a dashed
+    line for the median when it is available.
+    """
+    shapes = []
+    levels = sorted(percentiles)
+
+    # Shade nested bands between symmetric pairs of percentiles, so the
+    # central band ends up darker than the outer ones
+    while len(levels) >= 2:
+        low, high = levels.pop(0), levels.pop(-1)
+        shapes.append(
+            dict(
+                type="rect",
+                xref="paper",
+                x0=0,
+                x1=1,
+                y0=percentiles[low],
+                y1=percentiles[high],
+                fillcolor=COLOR_COHORT_BAND,
+                layer="below",
+                line=dict(width=0),
+            )
+        )
+
+    if levels:
+        median = percentiles[levels[0]]
+        shapes.append(
+            dict(
+                type="line",
+                xref="paper",
+                x0=0,
+                x1=1,
+                y0=median,
+                y1=median,
+                layer="below",
+                line=dict(color=COLOR_COHORT_MEDIAN, width=1, dash="dash"),
+            )
+        )
+    return shapes
+
+
+def plot_history(
+    marker: bm.Biomarker,
+    save_to: str,
+    percentiles: Optional[Dict[float, float]] = None,
+    include_plotlyjs: bool = True,
+    writer=None,
+    compact: bool = False,
+) -> Optional[str]:
     """
     Generate an interactive plot of the biomarker's history.
 
     The method uses the history and reference range of the biomarker instance to generate the plot.
     The method is part of the Biomarker class.
+
+    If cohort percentiles are provided, the range of values seen across the
+    cohort is shaded behind the data points.
+
+    If include_plotlyjs is False, the plotly.js library isn't embedded, and
+    the page showing the plot has to load it separately. If a writer such as
+    output.ContentStore is provided, the plot is saved through it.
+
+    If compact is True, the values are embedded as base64 typed arrays and
+    the draw dates as epoch milliseconds, in a single trace drawing both the
+    line and the points, which is much smaller and faster to parse for long
+    histories. This requires plotly 6 or later.
+
+    Returns the HTML of the plot, or None if the plot couldn't be generated.
     """
     dates = marker.history["Draw Date"].tolist()
     values = marker.history["Value"].tolist()
     try:
         values = np.array(values, dtype=float)
     except ValueError:
-        print(f"Failed to extract numerical values for {marker.name}")
-        return
+        diag.report(diag.NON_NUMERIC_VALUES, marker.name)
+        return None
 
-    # Get colors based on reference range
-    colors = [determine_color(val, marker.ref_range) for val in values]
+    min_val, max_val = marker.ref_range
 
     fig = go.Figure()
 
-    # Add a grey line to connect points
-    fig.add_trace(
-        go.Scatter(
-            x=dates,
-            y=values,
-            mode="lines",
-            line=dict(color=COLOR_LINE),
+    if compact:
+        # Color the points by a code picked from a discrete color scale:
+        # 0 within the reference range, 1 outside of it, 2 without a range
+        if min_val is None and max_val is None:
+            color_codes = np.full(len(values), 2, dtype=np.int8)
+        else:
+            color_codes = np.abs(
+                range_status(
+                    values,
+                    np.nan if min_val is None else min_val,
+                    np.nan if max_val is None else max_val,
+                )
+            )
+        fig.add_trace(
+            go.Scatter(
+                x=typed_array(
+                    marker.dates.astype("datetime64[ms]").astype(float)
+                ),
+                y=typed_array(values),
+                mode="lines+markers",
+                line=dict(color=COLOR_LINE),
+                marker=dict(
+                    color=typed_array(color_codes),
+                    cmin=0,
+                    cmax=2,
+                    colorscale=[
+                        [0, COLOR_GREEN],
+                        [0.5, COLOR_RED],
+                        [1, "grey"],
+                    ],
+                    size=10,
+                    line=dict(color="white", width=1),
+                ),
+            )
         )
-    )
+        fig.update_xaxes(type="date")
+    else:
+        # Get colors based on reference range
+        colors = [determine_color(val, marker.ref_range) for val in values]
 
-    # Add points with colors based on reference range
-    fig.add_trace(
-        go.Scatter(
-            x=dates,
-            y=values,
-            mode="markers",
-            marker=dict(
-                color=colors, size=10, line=dict(color="white", width=1)
-            ),
+        # Add a grey line to connect points
+        fig.add_trace(
+            go.Scatter(
+                x=dates,
+                y=values,
+                mode="lines",
+                line=dict(color=COLOR_LINE),
+            )
         )
-    )
 
-    min_val, max_val = marker.ref_range
+        # Add points with colors based on reference range
+        fig.add_trace(
+            go.Scatter(
+                x=dates,
+                y=values,
+                mode="markers",
+                marker=dict(
+                    color=colors, size=10, line=dict(color="white", width=1)
+                ),
+            )
+        )
 
     # Determine the data range
     data_min = min(values)
     data_max = max(values)
+    if percentiles:
+        # Keep the cohort bands in view, even beyond the patient's values
+        data_min = min(data_min, min(percentiles.values()))
+        data_max = max(data_max, max(percentiles.values()))
 
     # Define a buffer for y-axis (e.g., 10% of max_val)
     buffer = 0.1 * (max_val if max_val is not None else data_max)
@@ -166,6 +304,9 @@ def plot_history(marker: bm.Biomarker, save_to: str) -> None:
             )
         )
 
+    if percentiles:
+        shapes.extend(cohort_band_shapes(percentiles))
+
     font_family = dict(family="Montserrat, Helvetica, Arial, sans-serif")
 
     fig.update_layout(
@@ -196,4 +337,16 @@ def plot_history(marker: bm.Biomarker, save_to: str) -> None:
         font={**font_family, "size": 12},
     )
 
-    pyo.plot(fig, filename=save_to, auto_open=False)
+    # Use a stable div id so that unchanged plots produce identical files
+    plot_html = pio.to_html(
+        fig,
+        include_plotlyjs=include_plotlyjs,
+        full_html=True,
+        div_id="plot-" + util.generate_filename(marker.name)[: -len(".html")],
+    )
+    if writer is not None:
+        writer.write_text(save_to, plot_html)
+    else:
+        # Replace the file, as it may be linked to a shared store object
+        write_file_atomic(save_to, plot_html.encode("utf-8"))
+    return plot_html
@@ -0,0 +1,215 @@
+# filename: snapshot.py
+# Snapshots of the latest state of every biomarker, and changes between them
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+import biomarkerdash.biomarker as bm
+from biomarkerdash.analytics import (
+    MARKER,
+    STATUS_HIGH,
+    STATUS_IN_RANGE,
+    STATUS_LOW,
+    compute_trends,
+)
+from biomarkerdash.output import write_file_atomic
+
+SNAPSHOT_VERSION = 1
+
+# Latest state of a marker kept in a snapshot
+SNAPSHOT_COLUMNS = [
+    "unit",
+    "ref_min",
+    "ref_max",
+    "latest_date",
+    "latest_value",
+    "status",
+]
+
+# Why a marker appears in the changes between two snapshots
+CHANGE_NEW_MARKER = "new marker"
+CHANGE_NEW_RESULT = "new result"
+
+# How the latest value of a marker moved relative to its reference range
+RANGE_ENTERED = "entered range"
+RANGE_LEFT = "left range"
+
+
+def take_snapshot(biomarkers: Dict[str, bm.Biomarker]) -> pd.DataFrame:
+    """
+    Capture the latest state of every biomarker.
+
+    Args:
+    - biomarkers: Dictionary mapping marker names to Biomarker objects.
+
+    Returns:
+    - DataFrame indexed by marker name with the columns in SNAPSHOT_COLUMNS.
+    """
+    return compute_trends(biomarkers)[SNAPSHOT_COLUMNS].copy()
+
+
+def save_snapshot(snapshot: pd.DataFrame, path: str) -> None:
+    """
+    Write a snapshot to a JSON file.
+
+    The file is replaced atomically, so an interrupted build never leaves a
+    partially written snapshot behind.
+    """
+    markers = snapshot.assign(
+        latest_date=snapshot["latest_date"].dt.strftime("%Y-%m-%d")
+    ).astype(object)
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "markers": markers.where(markers.notna(), None).to_dict(
+            orient="index"
+        ),
+    }
+    write_file_atomic(path, json.dumps(data, indent=1).encode("utf-8"))
+
+
+def load_snapshot(path: str) -> pd.DataFrame:
+    """Read a snapshot from a JSON file written by save_snapshot."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data['version']}")
+    snapshot = pd.DataFrame.from_dict(
+        data["markers"], orient="index", columns=SNAPSHOT_COLUMNS
+    )
+    snapshot.index.name = MARKER
+    return snapshot.astype(
+        {
+            "ref_min": float,
+            "ref_max": float,
+            "latest_date": "datetime64[s]",
+            "latest_value": float,
+        }
+    )
+
+
+def diff_snapshots(
+    previous: pd.DataFrame, current: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Find the markers with a newer result than in a previous snapshot.
+
+    Both snapshots are aligned by marker name and compared in one
+    vectorized pass.
+
+    Args:
+    - previous: Snapshot of an earlier build.
+    - current: Snapshot of the current data.
+
+    Returns:
+    - DataFrame indexed by marker name with the current snapshot columns,
+    the previous_date, previous_value and previous_status, and:
+        - change, percent_change: Difference between the latest and previous
+        values, absolute and relative to the previous value.
+        - kind: Whether the marker is new, or has a new result.
+        - range_change: Whether the latest value entered or left the
+        reference range, or "" if neither.
+    Rows are sorted by decreasing magnitude of the relative change, with new
+    markers last.
+    """
+    joined = current.join(
+        previous[["latest_date", "latest_value", "status"]].rename(
+            columns={
+                "latest_date": "previous_date",
+                "latest_value": "previous_value",
+                "status": "previous_status",
+            }
+        ),
+        how="left",
+    )
+    new_marker = joined["previous_date"].isna()
+    new_result = joined["latest_date"] > joined["previous_date"]
+    delta = joined[new_marker | new_result].copy()
+    new_marker = new_marker[delta.index]
+
+    delta["change"] = delta["latest_value"] - delta["previous_value"]
+    delta["percent_change"] = (
+        delta["change"]
+        / delta["previous_value"].abs().where(delta["previous_value"] != 0)
+        * 100
+    )
+    delta["kind"] = np.where(new_marker, CHANGE_NEW_MARKER, CHANGE_NEW_RESULT)
+
+    out_of_range = [STATUS_LOW, STATUS_HIGH]
+    delta["range_change"] = np.select(
+        [
+            delta["previous_status"].isin(out_of_range)
+            & (delta["status"] == STATUS_IN_RANGE),
+            (delta["previous_status"] == STATUS_IN_RANGE)
+            & delta["status"].isin(out_of_range),
+        ],
+        [RANGE_ENTERED, RANGE_LEFT],
+        default="",
+    )
+
+    order = np.lexsort(
+        (
+            -delta["percent_change"].abs().fillna(-1).to_numpy(),
+            new_marker.to_numpy(),
+        )
+    )
+    return delta.iloc[order]
+
+
+def delta_report(delta: pd.DataFrame) -> Dict:
+    """Summarize the result of diff_snapshots as a JSON-compatible dict."""
+    records = delta.assign(
+        latest_date=delta["latest_date"].dt.strftime("%Y-%m-%d"),
+        previous_date=delta["previous_date"].dt.strftime("%Y-%m-%d"),
+    ).astype(object)
+    records = records.where(records.notna(), None)
+    return {
+        "new_results": int((delta["kind"] == CHANGE_NEW_RESULT).sum()),
+        "new_markers": int((delta["kind"] == CHANGE_NEW_MARKER).sum()),
+        "entered_range": delta.index[
+            delta["range_change"] == RANGE_ENTERED
+        ].tolist(),
+        "left_range": delta.index[
+            delta["range_change"] == RANGE_LEFT
+        ].tolist(),
+        "markers": [
+            {MARKER: name, **values}
+            for name, values in records.to_dict(orient="index").items()
+        ],
+    }
+
+
+def save_delta_report(delta: pd.DataFrame, path: str) -> None:
+    """Write the summary returned by delta_report to a JSON file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(delta_report(delta), f, indent=2)
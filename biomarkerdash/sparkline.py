@@ -0,0 +1,156 @@
+# filename: sparkline.py
+# Compact inline SVG sparklines for biomarker histories
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import numpy as np
+from typing import Optional, Tuple
+
+import biomarkerdash.biomarker as bm
+from biomarkerdash.analytics import range_status
+from biomarkerdash.constants import (
+    COLUMN_DRAW_DATE,
+    COLUMN_VALUE,
+    COLOR_RED,
+    COLOR_GREEN,
+    COLOR_BG_REF_RANGE,
+    COLOR_SPARKLINE,
+)
+
+
+def _format_coordinates(values: np.ndarray) -> np.ndarray:
+    return np.char.mod("%.1f", np.round(values, 1))
+
+
+def sparkline_svg(
+    dates: np.ndarray,
+    values: np.ndarray,
+    ref_range: Tuple[Optional[float], Optional[float]],
+    width: int = 120,
+    height: int = 24,
+) -> str:
+    """
+    Render a time series as a compact inline SVG sparkline.
+
+    Parameters:
+    - dates (np.ndarray): Draw dates, as datetime64 values.
+    - values (np.ndarray): Numeric values for each draw date.
+    - ref_range (Tuple[Optional[float], Optional[float]]): Tuple containing
+    the minimum and maximum values of the reference range.
+    - width (int): Width of the sparkline in pixels.
+    - height (int): Height of the sparkline in pixels.
+
+    Returns:
+    - str: SVG markup with the reference range shaded, a line through the
+    values and each point colored like determine_color, or an empty string
+    if there are no values.
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return ""
+    days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+    min_val, max_val = ref_range
+    min_bound = np.nan if min_val is None else min_val
+    max_bound = np.nan if max_val is None else max_val
+
+    # Scale dates and values to the drawing area, keeping the reference
+    # range bounds in view like the full plots do
+    pad = 2.5
+    day_span = np.ptp(days)
+    x = (
+        pad + (days - days.min()) / day_span * (width - 2 * pad)
+        if day_span
+        else np.full(len(values), width / 2)
+    )
+    y_low = np.nanmin([values.min(), min_bound, max_bound])
+    y_high = np.nanmax([values.max(), min_bound, max_bound])
+    y_span = (y_high - y_low) or 1.0
+
+    def to_y(v):
+        return height - pad - (v - y_low) / y_span * (height - 2 * pad)
+
+    y = to_y(values)
+    x_str = _format_coordinates(x)
+    y_str = _format_coordinates(y)
+
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" class="sparkline" '
+        f'width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+    )
+
+    if min_val is not None or max_val is not None:
+        band_top = 0.0 if max_val is None else to_y(max_val)
+        band_bottom = height if min_val is None else to_y(min_val)
+        svg += (
+            f'<rect x="0" y="{band_top:.1f}" width="{width}" '
+            f'height="{max(band_bottom - band_top, 0.5):.1f}" '
+            f'fill="{COLOR_BG_REF_RANGE}"/>'
+        )
+        status = range_status(values, min_bound, max_bound)
+        colors = np.where(status == 0, COLOR_GREEN, COLOR_RED)
+    else:
+        colors = np.full(len(values), "grey")
+
+    if len(values) > 1:
+        points = " ".join(np.char.add(np.char.add(x_str, ","), y_str))
+        svg += (
+            f'<polyline points="{points}" fill="none" '
+            f'stroke="{COLOR_SPARKLINE}" stroke-width="1"/>'
+        )
+
+    circles = np.char.add(
+        np.char.add(np.char.add('<circle cx="', x_str), '" cy="'), y_str
+    )
+    circles = np.char.add(
+        np.char.add(np.char.add(circles, '" r="1.5" fill="'), colors), '"/>'
+    )
+    svg += "".join(circles)
+
+    return svg + "</svg>"
+
+
+def biomarker_sparkline(
+    marker: bm.Biomarker, width: int = 120, height: int = 24
+) -> str:
+    """
+    Render the history of a biomarker as a compact inline SVG sparkline.
+
+    Returns an empty string if the history has no numerical values.
+    """
+    try:
+        values = marker.history[COLUMN_VALUE].to_numpy(dtype=float)
+    except ValueError:
+        return ""
+    dates = marker.history[COLUMN_DRAW_DATE].to_numpy(dtype="datetime64[ns]")
+    order = np.argsort(dates, kind="stable")
+    return sparkline_svg(
+        dates[order], values[order], marker.ref_range, width, height
+    )
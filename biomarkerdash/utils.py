@@ -30,56 +30,104 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import functools
 import re
 import pandas as pd
 from typing import Dict, Tuple, Optional
 
 import biomarkerdash.biomarker as bm
+import biomarkerdash.diagnostics as diag
 from biomarkerdash.constants import (
     COLUMN_MARKER_NAME,
     COLUMN_REFERENCE_RANGE,
     COLUMN_DRAW_DATE,
     COLUMN_VALUE,
     COLUMN_UNIT,
+    COLUMN_MARKER_DESCRIPTION,
 )
 
+# Number in a reference range, optionally signed or with thousands separators
+_NUMBER = r"[+-]?(?:\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d*)?|\.\d+)"
+
+# Grammar for every supported reference range format. Each alternative
+# captures its bounds in named groups, and any trailing text that doesn't
+# start like a number, such as a unit, is ignored. The bare "0" comes last,
+# so that ranges starting with 0, like "0 TO 99", match their own format
+# instead of "0" followed by a unit.
+_REF_RANGE_PATTERN = re.compile(
+    rf"""
+    (?:
+        (?:<\s*=?|<\s*OR\s*=|UP\s+TO|LESS\s+THAN(?:\s+OR\s+EQUAL\s+TO)?)
+        \s*(?P<max_only>{_NUMBER})                          # "<5.7", "<=5"
+      | (?:>\s*=?|>\s*OR\s*=|GREATER\s+THAN(?:\s+OR\s+EQUAL\s+TO)?)
+        \s*(?P<min_only>{_NUMBER})                          # ">60", "> OR = 60"
+      | (?P<max_postfix>{_NUMBER})\s+OR\s+(?:LESS|BELOW|LOWER)
+                                                            # "0.2 OR LESS"
+      | (?P<min_postfix>{_NUMBER})\s+OR\s+(?:MORE|GREATER|ABOVE|HIGHER)
+                                                            # "60 OR MORE"
+      | (?P<min>{_NUMBER})\s*(?:-|TO)\s*(?P<max>{_NUMBER})   # "3.5-5.3"
+      | (?P<zero>0)                                         # "0"
+    )
+    (?:\s*[^\d\s.,:+\-<>=].*)?                             # unit, if any
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
 
-def parse_ref_range(range_str: str) -> Tuple[Optional[float], Optional[float]]:
-    """Parse a reference range string and return a tuple (min_val, max_val)."""
+# Unicode dashes, minus signs and comparison symbols seen in lab exports,
+# normalized to their ASCII equivalents before matching
+_REF_RANGE_TRANSLATION = str.maketrans(
+    {
+        "\u2010": "-",  # hyphen
+        "\u2011": "-",  # non-breaking hyphen
+        "\u2012": "-",  # figure dash
+        "\u2013": "-",  # en dash
+        "\u2014": "-",  # em dash
+        "\u2212": "-",  # minus sign
+        "\u2264": "<=",  # less-than or equal to
+        "\u2a7d": "<=",  # slanted less-than or equal to
+        "\u2265": ">=",  # greater-than or equal to
+        "\u2a7e": ">=",  # slanted greater-than or equal to
+        "\u00a0": " ",  # non-breaking space
+    }
+)
+
+
+def _to_float(number: Optional[str]) -> Optional[float]:
+    return float(number.replace(",", "")) if number is not None else None
 
-    # Ensure the input is treated as a string
-    range_str = str(range_str).strip()
 
+@functools.lru_cache(maxsize=65536)
+def _parse_ref_range(
+    range_str: str,
+) -> Tuple[Optional[float], Optional[float]]:
+    """Parse a stripped reference range string, caching the result."""
     if not range_str or range_str.lower() == "nan":
         return None, None
 
-    # Single number 0 pattern
-    if range_str == "0":
+    if not range_str.isascii():
+        range_str = range_str.translate(_REF_RANGE_TRANSLATION)
+
+    m = _REF_RANGE_PATTERN.fullmatch(range_str)
+    if m is None:
+        return None, None
+
+    # The last group matched identifies which alternative of the grammar
+    # matched
+    kind = m.lastgroup
+    if kind == "zero":
         return 0.0, 0.0
+    if kind == "max":
+        return _to_float(m.group("min")), _to_float(m.group("max"))
+    if kind in ("min_only", "min_postfix"):
+        return _to_float(m.group(kind)), None
+    return None, _to_float(m.group(kind))
 
-    # Patterns
-    patterns = [
-        (r"^<([\d.]+)$", (None, 1)),  # "<5.7", "<130", etc.
-        (r"^>([\d.]+)$", (1, None)),  # ">5.7", ">130", etc.
-        (r"^> OR = ([\d.]+)$", (1, None)),  # "> OR = 60", etc.
-        (r"^< OR = ([\d.]+)$", (None, 1)),  # "< OR = 60", etc.
-        (r"^>=([\d.]+)$", (1, None)),  # ">=125", etc.
-        (r"^([\d.]+) OR LESS$", (None, 1)),  # "0.2 OR LESS"
-        (r"^([\d.-]+) - \+([\d.]+)$", (1, 2)),  # "-2.0 - +2.0"
-        (r"^([\d.-]+)-([\d.]+)$", (1, 2)),  # standard "min_val-max_val" format
-    ]
-
-    for pattern, idx in patterns:
-        m = re.match(pattern, range_str)
-        if m:
-            try:
-                min_v = float(m.group(idx[0])) if idx[0] is not None else None
-                max_v = float(m.group(idx[1])) if idx[1] is not None else None
-                return min_v, max_v
-            except (ValueError, IndexError):
-                pass
-
-    return None, None
+
+def parse_ref_range(range_str: str) -> Tuple[Optional[float], Optional[float]]:
+    """Parse a reference range string and return a tuple (min_val, max_val)."""
+
+    # Ensure the input is treated as a string
+    return _parse_ref_range(str(range_str).strip())
 
 
 def parse_wellnessfx_ref_ranges(
@@ -95,7 +143,7 @@ def parse_wellnessfx_ref_ranges(
         marker_name: str = row[COLUMN_MARKER_NAME]
         unit: str = row[COLUMN_UNIT]
         ref_range: str = row[COLUMN_REFERENCE_RANGE]
-        if str(ref_range).strip().lower() == "nan":
+        if pd.isna(ref_range) or str(ref_range).strip().lower() == "nan":
             ref_range = ""
 
         if not ref_range:
@@ -112,7 +160,7 @@ def parse_wellnessfx_ref_ranges(
         # e.g. a (value, unit, ref_range) of:
         # (0.673, x10E3/uL, 850-3900) would get adjusted to:
         # (0.673, x10E3/uL, 0.85-3.9)
-        if str(unit) != "nan" and "x10E3" in unit:
+        if not pd.isna(unit) and "x10E3" in unit:
             # This discrepancy is only found in Quest white blood cell counts,
             # not platelet count, so don't apply the correction for platelet
             # count
@@ -123,11 +171,14 @@ def parse_wellnessfx_ref_ranges(
                 # x10E3/u, the upper limit of the reference range always falls
                 # below 100.
                 if max_val is not None and max_val >= 100:
-                    print(
-                        f"Warning: Correcting reference range ({min_val}, "
-                        f"{max_val}) {unit} for {marker_name} to "
-                        f"({min_val / 1000 if min_val is not None else None}, "
-                        f"{max_val / 1000}) {unit} "
+                    diag.report(
+                        diag.RANGE_CORRECTION,
+                        marker_name,
+                        min_val,
+                        max_val,
+                        unit,
+                        min_val / 1000 if min_val is not None else None,
+                        max_val / 1000,
                     )
                     max_val = max_val / 1000
                     if min_val is not None:
@@ -140,46 +191,112 @@ def parse_wellnessfx_ref_ranges(
                 ]
                 # Update the reference range if the new one is different
                 if existing_min_val != min_val or existing_max_val != max_val:
-                    print(
-                        f"Warning: Different reference range for {marker_name} "
-                        f"on {row[COLUMN_DRAW_DATE]}. "
-                        f"Existing: {existing_min_val}-{existing_max_val}, "
-                        f"New: {min_val}-{max_val}"
-                        # f"\nCurrent ref range str: {ref_range}"
+                    diag.report(
+                        diag.RANGE_CONFLICT,
+                        marker_name,
+                        row[COLUMN_DRAW_DATE],
+                        existing_min_val,
+                        existing_max_val,
+                        min_val,
+                        max_val,
                     )
                     biomarker_to_range[marker_name] = (min_val, max_val)
             else:
                 biomarker_to_range[marker_name] = (min_val, max_val)
         else:
             # couldn't parse min_val/max_val value
-            print(
-                f"Error parsing reference range for {marker_name} on "
-                f"{row[COLUMN_DRAW_DATE]} from '{ref_range}'"
-                # f"\nmin_val: {min_val}"
-                # f"\nmax_val: {max_val}"
+            diag.report(
+                diag.RANGE_PARSE_ERROR,
+                marker_name,
+                ref_range,
+                row[COLUMN_DRAW_DATE],
             )
 
     return biomarker_to_range
 
 
-def load_wellnessfx_biomarkers(csv_path: str) -> Dict[str, bm.Biomarker]:
+def read_wellnessfx_csv(csv_path: str, engine: str = "pandas") -> pd.DataFrame:
+    """
+    Read a WellnessFX exported CSV into a DataFrame with cleaned up column
+    names and units.
+
+    Args:
+    - csv_path: Path to the CSV file.
+    - engine: "pandas" for the default pandas parser, or "pyarrow" to parse
+    the file with pyarrow's multithreaded CSV reader. The pyarrow engine
+    requires the optional pyarrow dependency and returns Arrow-backed
+    columns, with the text columns explicitly typed as strings.
+
+    Returns:
+    - DataFrame with one row per measurement.
+    """
+    if engine == "pyarrow":
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "The pyarrow engine requires pyarrow, install it with "
+                "`pip install biomarkerdash[arrow]`"
+            ) from e
+
+        string = pd.ArrowDtype(pa.string())
+        data = pd.read_csv(
+            csv_path,
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            dtype={
+                COLUMN_DRAW_DATE: string,
+                COLUMN_MARKER_NAME: string,
+                COLUMN_MARKER_DESCRIPTION: string,
+                COLUMN_UNIT: string,
+                COLUMN_REFERENCE_RANGE: string,
+            },
+        )
+    elif engine == "pandas":
+        data = pd.read_csv(csv_path, dtype={COLUMN_UNIT: str})
+    else:
+        raise ValueError(f"Unsupported CSV engine: {engine}")
+
+    # Trim unnecessary whitespace in column names
+    data.columns = data.columns.str.strip()
+
+    # Replace Unicode 63 (which is "?") with Unicode 956 (which is "µ") for the
+    # unit column. On Arrow-backed columns this runs as an Arrow compute
+    # kernel.
+    data[COLUMN_UNIT] = data[COLUMN_UNIT].str.replace(
+        chr(63), chr(956), regex=False
+    )
+
+    return data
+
+
+def load_wellnessfx_biomarkers(
+    csv_path: str, engine: str = "pandas"
+) -> Dict[str, bm.Biomarker]:
     """
     Processes a CSV file and returns a dictionary of biomarkers.
 
     Args:
     - csv_path: Path to the CSV file.
+    - engine: CSV parser to use, see read_wellnessfx_csv.
 
     Returns:
     - Dictionary mapping marker names to Biomarker objects.
     """
-    data = pd.read_csv(csv_path, dtype={COLUMN_UNIT: str})
+    return build_biomarkers(read_wellnessfx_csv(csv_path, engine=engine))
 
-    # Trim unnecessary whitespace in column names
-    data.columns = [col.strip() for col in data.columns]
 
-    # Replace Unicode 63 (which is "?") with Unicode 956 (which is "µ") for the unit column
-    data[COLUMN_UNIT] = data[COLUMN_UNIT].str.replace(chr(63), chr(956))
+def build_biomarkers(data: pd.DataFrame) -> Dict[str, bm.Biomarker]:
+    """
+    Create biomarkers from a DataFrame in the WellnessFX export format.
 
+    Args:
+    - data: DataFrame with one row per measurement, as returned by
+    read_wellnessfx_csv.
+
+    Returns:
+    - Dictionary mapping marker names to Biomarker objects.
+    """
     # Extract the reference ranges
     biomarker_to_range = parse_wellnessfx_ref_ranges(data)
 
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+# filename: benchmark_parse_ref_range.py
+# Benchmark reference range parsing against the previous implementation
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import random
+import re
+import time
+import pandas as pd
+from typing import Callable, List, Optional, Tuple
+
+import biomarkerdash.utils as util
+from biomarkerdash.constants import COLUMN_REFERENCE_RANGE
+
+# Formats commonly found in lab exports, used when no CSV files are given
+SAMPLE_RANGES = [
+    "3.5-5.3",
+    "135-146",
+    "<200",
+    "<130",
+    "> OR = 40",
+    "< OR = 80",
+    ">=125",
+    "0.2 OR LESS",
+    "-2.0 - +2.0",
+    "850.0-3900.0",
+    "0",
+    "nan",
+    "NEGATIVE",
+    "<=5",
+    "≥ 60",
+    "up to 5.0",
+    "3.5–5.3",
+    "65-99 mg/dL",
+    "unexpected-format",
+]
+
+
+def legacy_parse_ref_range(
+    range_str: str,
+) -> Tuple[Optional[float], Optional[float]]:
+    """Previous implementation, trying each pattern in sequence."""
+    range_str = str(range_str).strip()
+
+    if not range_str or range_str.lower() == "nan":
+        return None, None
+
+    if range_str == "0":
+        return 0.0, 0.0
+
+    patterns = [
+        (r"^<([\d.]+)$", (None, 1)),
+        (r"^>([\d.]+)$", (1, None)),
+        (r"^> OR = ([\d.]+)$", (1, None)),
+        (r"^< OR = ([\d.]+)$", (None, 1)),
+        (r"^>=([\d.]+)$", (1, None)),
+        (r"^([\d.]+) OR LESS$", (None, 1)),
+        (r"^([\d.-]+) - \+([\d.]+)$", (1, 2)),
+        (r"^([\d.-]+)-([\d.]+)$", (1, 2)),
+    ]
+
+    for pattern, idx in patterns:
+        m = re.match(pattern, range_str)
+        if m:
+            try:
+                min_v = float(m.group(idx[0])) if idx[0] is not None else None
+                max_v = float(m.group(idx[1])) if idx[1] is not None else None
+                return min_v, max_v
+            except (ValueError, IndexError):
+                pass
+
+    return None, None
+
+
+def time_parser(parser: Callable, range_strs: List[str]) -> float:
+    start = time.perf_counter()
+    for range_str in range_strs:
+        parser(range_str)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare reference range parsing speed with the previous "
+        "sequential regex implementation"
+    )
+    parser.add_argument(
+        "csv_paths",
+        nargs="*",
+        help="WellnessFX exports to take reference ranges from, instead of "
+        "the built-in sample of formats",
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=1_000_000,
+        help="number of range strings to parse",
+    )
+    args = parser.parse_args()
+
+    if args.csv_paths:
+        source = pd.concat(
+            util.read_wellnessfx_csv(csv_path)[COLUMN_REFERENCE_RANGE]
+            for csv_path in args.csv_paths
+        ).tolist()
+    else:
+        source = SAMPLE_RANGES
+    rng = random.Random(0)
+    range_strs = [rng.choice(source) for _ in range(args.count)]
+
+    legacy = time_parser(legacy_parse_ref_range, range_strs)
+    uncached = time_parser(
+        lambda s: util._parse_ref_range.__wrapped__(str(s).strip()),
+        range_strs,
+    )
+    util._parse_ref_range.cache_clear()
+    cached = time_parser(util.parse_ref_range, range_strs)
+
+    print(f"Parsed {len(range_strs)} range strings")
+    print(f"  sequential patterns: {legacy:.2f} s")
+    print(
+        f"  single grammar:      {uncached:.2f} s ({legacy / uncached:.1f}x)"
+    )
+    print(f"  grammar with cache:  {cached:.2f} s ({legacy / cached:.1f}x)")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# filename: build_archive.py
+# Write WellnessFX exports or a results database to a memory-mapped archive
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+import os
+from typing import Dict
+
+import biomarkerdash.diagnostics as diag
+import biomarkerdash.utils as util
+from biomarkerdash.archive import ArchiveWriter
+from biomarkerdash.database import ResultsDatabase
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write the results of many patients to a columnar "
+        "archive that workers can memory-map and slice one patient at a time"
+    )
+    parser.add_argument(
+        "csv_paths",
+        nargs="*",
+        help="paths to the exported CSV files, one per patient, given as "
+        "PATIENT=PATH to set the patient identifier; a plain PATH uses the "
+        "name of the directory holding the export",
+    )
+    parser.add_argument(
+        "--database",
+        help="SQLite results database whose patients are all archived",
+    )
+    parser.add_argument(
+        "--output",
+        default="biomarker_archive",
+        help="directory to write the archive to",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "pyarrow"],
+        default="pandas",
+        help="CSV parser; pyarrow parses large exports on all cores and "
+        "requires the optional pyarrow dependency",
+    )
+    args = parser.parse_args()
+    if not args.csv_paths and not args.database:
+        parser.error("CSV exports or a --database are required")
+
+    # Every export is named test_result_export.csv, so patients are told
+    # apart by an explicit identifier or by the directory of their export
+    exports: Dict[str, str] = {}
+    for csv_arg in args.csv_paths:
+        patient, separator, csv_path = csv_arg.partition("=")
+        if not separator:
+            csv_path = csv_arg
+            patient = os.path.basename(
+                os.path.dirname(os.path.abspath(csv_path))
+            )
+        if patient in exports:
+            parser.error(
+                f"patient {patient} is given twice, use PATIENT=PATH to "
+                "set distinct identifiers"
+            )
+        exports[patient] = csv_path
+
+    rows = 0
+    with ArchiveWriter(args.output) as writer:
+        for patient, csv_path in exports.items():
+            rows += writer.add_patient(
+                patient,
+                util.load_wellnessfx_biomarkers(csv_path, engine=args.engine),
+            )
+        if args.database:
+            with ResultsDatabase(args.database) as database:
+                for patient in database.patients():
+                    rows += writer.add_patient(
+                        patient, database.load_biomarkers(patient)
+                    )
+
+    print(
+        f"Wrote {rows} results for {len(writer.patients)} patients and "
+        f"{len(writer.markers)} markers to {args.output}"
+    )
+    print(diag.get_collector().summary())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# filename: build_cohort_stats.py
+# Script to summarize many WellnessFX exports into cohort statistics
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import argparse
+
+import biomarkerdash.diagnostics as diag
+from biomarkerdash.cohort import CohortStats, build_cohort_stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stream WellnessFX exports into per-marker quantile "
+        "sketches that can be merged and reused across dashboard builds"
+    )
+    parser.add_argument(
+        "csv_paths", nargs="+", help="paths to the exported CSV files"
+    )
+    parser.add_argument(
+        "--output",
+        default="cohort_stats.json",
+        help="file to write the cohort statistics to",
+    )
+    parser.add_argument(
+        "--existing",
+        help="previously written cohort statistics to merge the new exports "
+        "into",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--compression",
+        type=float,
+        default=100.0,
+        help="sketch compression, higher values are more accurate",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "pyarrow"],
+        default="pandas",
+        help="CSV parser; pyarrow parses large exports on all cores and "
+        "requires the optional pyarrow dependency",
+    )
+    args = parser.parse_args()
+
+    cohort = build_cohort_stats(
+        args.csv_paths,
+        workers=args.workers,
+        compression=args.compression,
+        engine=args.engine,
+    )
+    if args.existing:
+        existing = CohortStats.load(args.existing)
+        existing.merge(cohort)
+        cohort = existing
+
+    cohort.save(args.output)
+    print(
+        f"Wrote statistics for {len(cohort.markers)} markers from "
+        f"{len(args.csv_paths)} exports to {args.output}"
+    )
+    print(diag.get_collector().summary())
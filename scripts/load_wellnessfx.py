@@ -32,16 +32,47 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
+import argparse
 import os
-import sys
+import plotly
 import yaml
 
-from typing import Dict
+from plotly.offline import get_plotlyjs
+from typing import Dict, List, Sequence
 
+import biomarkerdash.biomarker as bm
+import biomarkerdash.diagnostics as diag
+import biomarkerdash.snapshot as snap
 import biomarkerdash.utils as util
 import biomarkerdash.plotting as plot
 import biomarkerdash.html as htm
-from biomarkerdash.constants import FOOTER_HTML, INDEX_PAGE_CATEGORY
+from biomarkerdash.analytics import biomarkers_to_frame
+from biomarkerdash.cohort import CohortStats
+from biomarkerdash.database import ResultsDatabase
+from biomarkerdash.derived import (
+    compute_derived_markers,
+    load_derived_markers,
+)
+from biomarkerdash.dedup import (
+    COLUMN_EXPORT,
+    ExportDeduplicator,
+    read_deduplicated_exports,
+)
+from biomarkerdash.constants import (
+    COLUMN_DRAW_DATE,
+    COLUMN_MARKER_NAME,
+    COLUMN_UNIT,
+    COLUMN_VALUE,
+    DELTA_PAGE_TITLE,
+    FOOTER_HTML,
+    INDEX_PAGE_CATEGORY,
+    OUT_OF_RANGE_PAGE_TITLE,
+)
+from biomarkerdash.output import BackgroundWriter, ContentStore
+
+# Shared assets referenced by every page when building with a content store
+STYLESHEET_FILENAME = "styles.css"
+PLOTLYJS_FILENAME = "plotly.min.js"
 
 
 def load_categories(filename: str) -> Dict:
@@ -51,15 +82,176 @@ def load_categories(filename: str) -> Dict:
         return yaml.safe_load(f)
 
 
+def create_page_header(
+    categories: Dict,
+    css_filepath: str,
+    current_category: str,
+    prefix: str = "",
+    shared_assets: bool = False,
+    summary_titles: Sequence[str] = (OUT_OF_RANGE_PAGE_TITLE,),
+) -> str:
+    """
+    Create the header and TOC for a dashboard page.
+
+    Links to the other pages, including the summary pages in summary_titles,
+    and to the shared stylesheet and plotly.js assets when shared_assets is
+    set, are prefixed with prefix.
+    """
+    return htm.create_header_toc(
+        {
+            cat: os.path.join(prefix, util.generate_filename(cat))
+            for cat in categories.keys()
+        },
+        css_filepath,
+        current_category=current_category,
+        summary_files={
+            title: os.path.join(prefix, util.generate_filename(title))
+            for title in summary_titles
+        },
+        css_href=(
+            os.path.join(prefix, STYLESHEET_FILENAME)
+            if shared_assets
+            else None
+        ),
+        plotlyjs_src=(
+            os.path.join(prefix, PLOTLYJS_FILENAME) if shared_assets else None
+        ),
+    )
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print(
-            "Usage: python3 load_wellnessfx.py <path/to/test_result_export.csv>"
+    parser = argparse.ArgumentParser(
+        description="Generate an interactive dashboard from a WellnessFX export"
+    )
+    parser.add_argument(
+        "csv_paths",
+        nargs="*",
+        help="paths to the exported test_result_export.csv files; exports "
+        "with overlapping date ranges are deduplicated, and the paths are "
+        "optional when building from a --database that already holds the "
+        "results",
+    )
+    parser.add_argument(
+        "--cohort",
+        help="cohort statistics written by build_cohort_stats.py, used to "
+        "draw cohort percentile bands on every plot",
+    )
+    parser.add_argument(
+        "--store",
+        help="directory of a content-addressed store; pages, plots and "
+        "assets are saved there once per unique content and linked into the "
+        "output folders, and the store can be shared between builds",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "pyarrow"],
+        default="pandas",
+        help="CSV parser; pyarrow parses large exports on all cores and "
+        "requires the optional pyarrow dependency",
+    )
+    parser.add_argument(
+        "--database",
+        help="SQLite results database; each export is appended to it, "
+        "skipping results it already holds, and the dashboard is built from "
+        "the patient's complete history in the database",
+    )
+    parser.add_argument(
+        "--patient",
+        default="default",
+        help="identifier of the patient in the --database",
+    )
+    parser.add_argument(
+        "--derived",
+        help="YAML file of formulas for biomarkers calculated from other "
+        "biomarkers, defaults to derived_markers.yaml",
+    )
+    parser.add_argument(
+        "--since",
+        help="only show results drawn on or after this date (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--until",
+        help="only show results drawn on or before this date (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="JSON file holding the latest state of every marker; the "
+        "results are compared with it to list what changed since the last "
+        "build, and it is then updated",
+    )
+    parser.add_argument(
+        "--delta-report",
+        help="JSON file to write the changes since the --snapshot to, "
+        "defaults to the snapshot path with a _delta suffix",
+    )
+    parser.add_argument(
+        "--compact-plots",
+        action="store_true",
+        help="embed plot data as base64 typed arrays, which makes plots of "
+        "long histories much smaller and faster to load; requires plotly 6 "
+        "or later",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="print every data issue as it is found, instead of only a "
+        "summary at the end",
+    )
+    parser.add_argument(
+        "--diagnostics",
+        help="JSON file to write the summary of data issues to",
+    )
+    args = parser.parse_args()
+    # plotly 5 rejects the typed arrays used by compact plots
+    if args.compact_plots and int(plotly.__version__.split(".")[0]) < 6:
+        parser.error(
+            "--compact-plots requires plotly 6 or later, found "
+            f"{plotly.__version__}"
         )
-        sys.exit(1)
+    diagnostics = diag.Diagnostics(verbose=args.verbose)
+    diag.set_collector(diagnostics)
 
-    csv_path: str = sys.argv[1]
-    biomarkers = util.load_wellnessfx_biomarkers(csv_path)
+    csv_paths: List[str] = args.csv_paths
+    deduplicator = ExportDeduplicator()
+    if args.database:
+        with ResultsDatabase(args.database) as database:
+            # Import every export as read, so that each file is recorded as
+            # its own import with all of its rows. The database skips the
+            # results it already holds, and the deduplicator only reports
+            # conflicts between the exports.
+            for csv_path in csv_paths:
+                data = util.read_wellnessfx_csv(csv_path, engine=args.engine)
+                deduplicator.add(data, csv_path)
+                rows_added = database.import_frame(
+                    data, args.patient, source_path=csv_path
+                )
+                print(
+                    f"Added {rows_added} new results from {csv_path} to "
+                    f"{args.database}"
+                )
+            biomarkers = database.load_biomarkers(args.patient)
+    elif csv_paths:
+        data, deduplicator = read_deduplicated_exports(
+            csv_paths, engine=args.engine
+        )
+        biomarkers = util.build_biomarkers(data)
+    else:
+        parser.error("a CSV export or a --database is required")
+    if csv_paths:
+        print(
+            f"Removed {deduplicator.stats['duplicates_removed']} duplicate "
+            f"results from {deduplicator.stats['rows_read']} read"
+        )
+        for _, row in deduplicator.conflicts.iterrows():
+            diag.report(
+                diag.CONFLICTING_RESULT,
+                row[COLUMN_MARKER_NAME],
+                row[COLUMN_VALUE],
+                row[COLUMN_UNIT],
+                row[COLUMN_DRAW_DATE],
+                row[COLUMN_EXPORT],
+            )
+    cohort = CohortStats.load(args.cohort) if args.cohort else None
 
     # Get the current script directory and navigate one level up to preserve
     # the correct behavior regardless of where the script is called from
@@ -75,71 +267,205 @@ if __name__ == "__main__":
     categories_filepath = os.path.join(parent_dir, categories_filename)
     categories = load_categories(categories_filepath)
 
-    output_files = []
-
-    # Storage for content to be used in the index page
-    index_page_main_content = ""
-
-    for category, subcategories in categories.items():
-        html_content = [f'<h2 id="{category}">{category}</h2>']
-        for subcategory, biomarkers_list in subcategories.items():
-            html_content.append(f'<h3 id="{subcategory}">{subcategory}</h3>')
-            for marker_name in biomarkers_list:
-                marker_obj = biomarkers.get(marker_name)
-                if marker_obj:
-                    filename = os.path.join(
-                        plot_output_dir, util.generate_filename(marker_name)
-                    )
-                    plot.plot_history(marker_obj, save_to=filename)
-                    print(f"Plot for {marker_name} saved to {filename}.")
-                    if os.path.exists(filename):
-                        with open(filename, "r", encoding="utf-8") as f:
-                            marker_plot_html = f.read()
-                            html_content.append(marker_plot_html)
+    derived_filepath = args.derived or os.path.join(
+        parent_dir, "derived_markers.yaml"
+    )
+    derived = compute_derived_markers(
+        biomarkers, load_derived_markers(derived_filepath)
+    )
+    biomarkers.update(derived)
+    print(f"Calculated {len(derived)} derived biomarkers")
 
-        output_file = htm.combine_html_files(
-            category, html_content, category_page_output_dir
+    # Compare the latest state of every marker with the previous build,
+    # before a time window can hide the latest results
+    summary_titles = [OUT_OF_RANGE_PAGE_TITLE]
+    if args.snapshot:
+        current_snapshot = snap.take_snapshot(biomarkers)
+        previous_snapshot = (
+            snap.load_snapshot(args.snapshot)
+            if os.path.exists(args.snapshot)
+            else current_snapshot.iloc[:0]
         )
-        output_files.append((category, output_file))
+        delta = snap.diff_snapshots(previous_snapshot, current_snapshot)
+        summary_titles.append(DELTA_PAGE_TITLE)
 
-        if category == INDEX_PAGE_CATEGORY:
-            index_page_main_content = "".join(html_content)
+    if args.since or args.until:
+        biomarkers = bm.window_biomarkers(biomarkers, args.since, args.until)
+        print(
+            f"Kept {len(biomarkers)} biomarkers with results from "
+            f"{args.since or 'the first draw'} to "
+            f"{args.until or 'the last draw'}"
+        )
 
     css_filepath = os.path.join(parent_dir, "_includes/styles.css")
+    store = ContentStore(args.store) if args.store else None
 
-    # Now that all category files have been generated, create the TOC
-    # and prepend to each category file
-    for category, output_file in output_files:
+    # Pages and plots are written on a background thread, so the next ones
+    # can be rendered while earlier ones are still being flushed to disk
+    with BackgroundWriter(backend=store) as writer:
+        # With a content store, the stylesheet and plotly.js are saved once
+        # next to the category pages and referenced, instead of being
+        # embedded in every page and plot
+        if store is not None:
+            writer.write_text(
+                os.path.join(category_page_output_dir, STYLESHEET_FILENAME),
+                htm.load_css(css_filepath),
+            )
+            writer.write_text(
+                os.path.join(category_page_output_dir, PLOTLYJS_FILENAME),
+                get_plotlyjs(),
+            )
 
-        header = htm.create_header_toc(
-            {cat: util.generate_filename(cat) for cat in categories.keys()},
-            css_filepath,
-            current_category=category
+        # Summarize every out of range marker on its own page, linking each one
+        # to the category page showing its full plot
+        marker_links = {
+            marker_name: f"{util.generate_filename(category)}#{subcategory}"
+            for category, subcategories in categories.items()
+            for subcategory, biomarkers_list in subcategories.items()
+            for marker_name in biomarkers_list
+        }
+        htm.combine_html_files(
+            OUT_OF_RANGE_PAGE_TITLE,
+            [
+                create_page_header(
+                    categories,
+                    css_filepath,
+                    OUT_OF_RANGE_PAGE_TITLE,
+                    shared_assets=store is not None,
+                    summary_titles=summary_titles,
+                ),
+                htm.create_out_of_range_html(
+                    biomarkers_to_frame(biomarkers), marker_links
+                ),
+            ],
+            category_page_output_dir,
+            writer=writer,
         )
-        with open(output_file, "r+", encoding="utf-8") as f:
-            content = f.read()
-            f.seek(0, 0)
-            f.write(header + content)
-
-    # Create the index page
-    index_page_filename = "BiomarkerDashboard.html"
-    index_page_filepath = os.path.join(parent_dir, index_page_filename)
-    index_page_html_content = (
-        htm.create_header_toc(
-            {
-                cat: os.path.join(
-                    category_page_output_dir, util.generate_filename(cat)
+
+        # List the markers with new results since the previous build on their
+        # own page and in a JSON report
+        if args.snapshot:
+            htm.combine_html_files(
+                DELTA_PAGE_TITLE,
+                [
+                    create_page_header(
+                        categories,
+                        css_filepath,
+                        DELTA_PAGE_TITLE,
+                        shared_assets=store is not None,
+                        summary_titles=summary_titles,
+                    ),
+                    htm.create_delta_html(delta, marker_links),
+                ],
+                category_page_output_dir,
+                writer=writer,
+            )
+            delta_report_path = (
+                args.delta_report
+                or os.path.splitext(args.snapshot)[0] + "_delta.json"
+            )
+            snap.save_delta_report(delta, delta_report_path)
+            print(
+                f"Wrote changes for {len(delta)} markers to "
+                f"{delta_report_path}"
+            )
+
+        # Storage for content to be used in the index page
+        index_page_main_content = ""
+
+        for category, subcategories in categories.items():
+            html_content = [f'<h2 id="{category}">{category}</h2>']
+            for subcategory, biomarkers_list in subcategories.items():
+                html_content.append(
+                    f'<h3 id="{subcategory}">{subcategory}</h3>'
                 )
-                for cat in categories.keys()
-            },
-            css_filepath,
-            current_category=INDEX_PAGE_CATEGORY
-        )
-        + index_page_main_content
-        + FOOTER_HTML
-    )
+                for marker_name in biomarkers_list:
+                    marker_obj = biomarkers.get(marker_name)
+                    if marker_obj:
+                        filename = os.path.join(
+                            plot_output_dir,
+                            util.generate_filename(marker_name),
+                        )
+                        percentiles = (
+                            cohort.percentiles(
+                                marker_obj.name, marker_obj.unit
+                            )
+                            if cohort
+                            else None
+                        )
+                        marker_plot_html = plot.plot_history(
+                            marker_obj,
+                            save_to=filename,
+                            percentiles=percentiles,
+                            include_plotlyjs=store is None,
+                            writer=writer,
+                            compact=args.compact_plots,
+                        )
+                        if marker_plot_html:
+                            print(
+                                f"Queued plot for {marker_name} for {filename}"
+                            )
+                            html_content.append(marker_plot_html)
 
-    with open(index_page_filepath, "w", encoding="utf-8") as f:
-        f.write(index_page_html_content)
+            htm.combine_html_files(
+                category,
+                [
+                    create_page_header(
+                        categories,
+                        css_filepath,
+                        category,
+                        shared_assets=store is not None,
+                        summary_titles=summary_titles,
+                    )
+                ]
+                + html_content,
+                category_page_output_dir,
+                writer=writer,
+            )
+
+            if category == INDEX_PAGE_CATEGORY:
+                index_page_main_content = "".join(html_content)
 
+        # Create the index page
+        index_page_filename = "BiomarkerDashboard.html"
+        index_page_filepath = os.path.join(parent_dir, index_page_filename)
+        if store is not None:
+            # Refer to the index category page instead of copying its content
+            index_category_path = os.path.join(
+                os.path.basename(category_page_output_dir),
+                util.generate_filename(INDEX_PAGE_CATEGORY),
+            )
+            writer.write_text(
+                index_page_filepath,
+                '<!DOCTYPE html><html><head><meta http-equiv="refresh" '
+                f'content="0; url={index_category_path}"></head></html>',
+            )
+        else:
+            index_page_html_content = (
+                create_page_header(
+                    categories,
+                    css_filepath,
+                    INDEX_PAGE_CATEGORY,
+                    prefix=category_page_output_dir,
+                    summary_titles=summary_titles,
+                )
+                + index_page_main_content
+                + FOOTER_HTML
+            )
+            writer.write_text(index_page_filepath, index_page_html_content)
+
+    write_stats = writer.stats()
+    print(
+        f"Wrote {write_stats['writes']} files, max queue depth "
+        f"{write_stats['max_queue_depth']}, mean write latency "
+        f"{write_stats['mean_write_seconds'] * 1000:.1f} ms"
+    )
+    if store is not None:
+        print(f"Content store: {store.stats}")
+    if args.snapshot:
+        # Only replace the snapshot once the dashboard has been written
+        snap.save_snapshot(current_snapshot, args.snapshot)
+    print(diagnostics.summary())
+    if args.diagnostics:
+        diagnostics.save(args.diagnostics)
     print("Generated BiomarkerDashboard.html")
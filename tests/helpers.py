@@ -0,0 +1,58 @@
+# filename: helpers.py
+# Shared fixtures for the unit tests
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import pandas as pd
+
+import biomarkerdash.biomarker as bm
+
+# Columns of a WellnessFX export
+EXPORT_COLUMNS = [
+    "Draw Date",
+    "Marker Name",
+    "Marker Description",
+    "Value",
+    "Units",
+    "Reference Range",
+]
+
+
+def make_biomarker(name, ref_range, entries, unit="mg/dL"):
+    """Create a biomarker with a history of (draw date, value) entries."""
+    biomarker = bm.Biomarker(name, "", unit, ref_range)
+    for draw_date, value in entries:
+        biomarker.add_history_entry(draw_date, value, unit)
+    return biomarker
+
+
+def make_export(rows, columns=EXPORT_COLUMNS):
+    """Create a DataFrame like an export read by read_wellnessfx_csv."""
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,111 @@
+# filename: test_analytics.py
+# Unit tests for biomarker trend analytics
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import biomarkerdash.analytics as analytics
+from tests.helpers import make_biomarker
+
+
+class TestRangeStatus(unittest.TestCase):
+    def test_range_status(self):
+        status = analytics.range_status(
+            [1.0, 5.0, 9.0, 9.0, 1.0],
+            [2.0, 2.0, 2.0, np.nan, np.nan],
+            [8.0, 8.0, 8.0, np.nan, 0.5],
+        )
+        self.assertEqual(status.tolist(), [-1, 0, 1, 0, 1])
+
+
+class TestComputeTrends(unittest.TestCase):
+    def setUp(self):
+        self.biomarkers = {
+            "LDL": make_biomarker(
+                "LDL",
+                (None, 100.0),
+                [
+                    ("01/01/20", 90),
+                    ("01/01/21", 110),
+                    ("01/01/22", 130),
+                ],
+            ),
+            "HDL": make_biomarker(
+                "HDL", (40.0, None), [("01/01/21", 35), ("07/01/21", 45)]
+            ),
+            "Omega Index": make_biomarker(
+                "Omega Index", (None, None), [("01/01/21", "8.5")]
+            ),
+        }
+        self.trends = analytics.compute_trends(self.biomarkers, window=2)
+
+    def test_latest_and_change(self):
+        ldl = self.trends.loc["LDL"]
+        self.assertEqual(ldl["count"], 3)
+        self.assertEqual(ldl["latest_value"], 130)
+        self.assertEqual(ldl["previous_value"], 110)
+        self.assertEqual(ldl["change"], 20)
+        self.assertEqual(ldl["rolling_mean"], 120)
+        self.assertEqual(ldl["latest_date"], pd.Timestamp("2022-01-01"))
+
+    def test_slope(self):
+        self.assertAlmostEqual(
+            self.trends.loc["LDL", "slope_per_year"], 20.0, delta=0.1
+        )
+        self.assertTrue(
+            np.isnan(self.trends.loc["Omega Index", "slope_per_year"])
+        )
+
+    def test_range_crossing(self):
+        ldl = self.trends.loc["LDL"]
+        self.assertEqual(ldl["status"], analytics.STATUS_HIGH)
+        self.assertTrue(ldl["crossed"])
+        self.assertEqual(ldl["last_crossing_date"], pd.Timestamp("2021-01-01"))
+        self.assertEqual(ldl["last_in_range_date"], pd.Timestamp("2020-01-01"))
+
+        hdl = self.trends.loc["HDL"]
+        self.assertEqual(hdl["status"], analytics.STATUS_IN_RANGE)
+        self.assertEqual(hdl["last_crossing_date"], pd.Timestamp("2021-07-01"))
+
+        omega = self.trends.loc["Omega Index"]
+        self.assertEqual(omega["status"], analytics.STATUS_UNKNOWN)
+        self.assertFalse(omega["crossed"])
+        self.assertTrue(pd.isna(omega["previous_value"]))
+
+    def test_empty(self):
+        self.assertTrue(analytics.compute_trends({}).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# filename: test_archive.py
+# Unit tests for the memory-mapped biomarker archive
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from biomarkerdash.archive import (
+    STATUS_NO_RANGE,
+    ArchiveWriter,
+    BiomarkerArchive,
+)
+from tests.helpers import make_biomarker
+
+
+class TestBiomarkerArchive(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with ArchiveWriter(self.directory.name) as writer:
+            writer.add_patient(
+                "p1",
+                {
+                    "HDL": make_biomarker(
+                        "HDL", (40.0, None), [("01/15/19", 35.0)]
+                    ),
+                    "LDL": make_biomarker(
+                        "LDL",
+                        (None, 100.0),
+                        [("06/20/19", 120.0), ("01/15/19", "<5")],
+                    ),
+                },
+            )
+            writer.add_patient("p2", {})
+            writer.add_patient(
+                "p3",
+                {
+                    "LDL": make_biomarker(
+                        "LDL", (None, 100.0), [("01/10/20", 90.0)]
+                    ),
+                    "Glucose": make_biomarker(
+                        "Glucose", (None, None), [("01/10/20", 90.0)]
+                    ),
+                },
+            )
+            with self.assertRaises(ValueError):
+                writer.add_patient("p1", {})
+        self.archive = BiomarkerArchive(self.directory.name)
+
+    def tearDown(self):
+        del self.archive
+        self.directory.cleanup()
+
+    def test_metadata(self):
+        self.assertEqual(len(self.archive), 4)
+        self.assertEqual(self.archive.patients, ["p1", "p2", "p3"])
+        self.assertEqual(self.archive.markers, ["HDL", "LDL", "Glucose"])
+        self.assertIn("p3", self.archive)
+        self.assertNotIn("p4", self.archive)
+
+    def test_patient_columns(self):
+        columns = self.archive.patient_columns("p1")
+        # Non-numeric values aren't archived
+        self.assertEqual(columns["marker"].tolist(), [0, 1])
+        self.assertEqual(columns["value"].tolist(), [35.0, 120.0])
+        self.assertEqual(columns["status"].tolist(), [-1, 1])
+        self.assertEqual(
+            columns["date"].tolist(),
+            list(np.array(["2019-01-15", "2019-06-20"], dtype="M8[D]")),
+        )
+        self.assertTrue(
+            np.shares_memory(columns["value"], self.archive.columns["value"])
+        )
+        self.assertFalse(columns["value"].flags.writeable)
+        self.assertEqual(len(self.archive.patient_columns("p2")["value"]), 0)
+        with self.assertRaises(KeyError):
+            self.archive.patient_columns("p4")
+
+    def test_patient_frame(self):
+        data = self.archive.patient_frame("p3")
+        self.assertEqual(data["marker"].tolist(), ["Glucose", "LDL"])
+        self.assertEqual(data["Value"].tolist(), [90.0, 90.0])
+        # Values without a reference range aren't reported as in range
+        self.assertEqual(data["status"].tolist(), [STATUS_NO_RANGE, 0])
+
+    def test_failed_write(self):
+        # Overwriting the archive fails halfway, leaving nothing to open
+        with self.assertRaises(RuntimeError):
+            with ArchiveWriter(self.directory.name) as writer:
+                writer.add_patient("p1", {})
+                raise RuntimeError("export could not be read")
+        with self.assertRaises(FileNotFoundError):
+            BiomarkerArchive(self.directory.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
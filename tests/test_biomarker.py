@@ -0,0 +1,95 @@
+# filename: test_biomarker.py
+# Unit tests for biomarker histories
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+import biomarkerdash.biomarker as bm
+from tests.helpers import make_biomarker
+
+
+class TestBiomarkerWindow(unittest.TestCase):
+    def setUp(self):
+        self.hdl = make_biomarker(
+            "HDL",
+            (40.0, None),
+            [
+                ("01/10/20", 50.0),
+                ("01/15/19", 41.0),
+                ("06/20/19", 45.0),
+                ("01/15/19", 42.0),
+            ],
+        )
+
+    def test_sorted_history(self):
+        self.assertEqual(
+            self.hdl.history["Value"].tolist(), [41.0, 42.0, 45.0, 50.0]
+        )
+        self.assertEqual(
+            self.hdl.dates.tolist(),
+            pd.to_datetime(
+                ["2019-01-15", "2019-01-15", "2019-06-20", "2020-01-10"]
+            ).tolist(),
+        )
+        self.hdl.add_history_entry("03/01/18", 39.0, "mg/dL")
+        self.assertEqual(self.hdl.history["Value"].iloc[0], 39.0)
+
+    def test_window(self):
+        windowed = self.hdl.window("2019-01-15", datetime(2019, 6, 20))
+        self.assertEqual(
+            windowed.history["Value"].tolist(), [41.0, 42.0, 45.0]
+        )
+        self.assertEqual(windowed.ref_range, (40.0, None))
+        self.assertEqual(
+            self.hdl.window(since="2019-02-01").history["Value"].tolist(),
+            [45.0, 50.0],
+        )
+        self.assertEqual(
+            self.hdl.window(until="2019-01-14").history["Value"].tolist(), []
+        )
+        # The original history is left untouched
+        self.assertEqual(len(self.hdl.history), 4)
+
+    def test_window_biomarkers(self):
+        biomarkers = {
+            "HDL": self.hdl,
+            "LDL": make_biomarker("LDL", (40.0, None), [("01/15/19", 90.0)]),
+        }
+        windowed = bm.window_biomarkers(biomarkers, since="2019-06-01")
+        self.assertEqual(list(windowed), ["HDL"])
+        self.assertEqual(len(windowed["HDL"].history), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
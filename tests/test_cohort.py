@@ -0,0 +1,130 @@
+# filename: test_cohort.py
+# Unit tests for cohort quantile sketches
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from biomarkerdash.cohort import CohortStats, QuantileSketch
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = rng.normal(100.0, 15.0, 50000)
+
+    def test_quantiles(self):
+        sketch = QuantileSketch()
+        sketch.update(self.values)
+        for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+            self.assertAlmostEqual(
+                sketch.quantile(q), np.quantile(self.values, q), delta=1.0
+            )
+        self.assertEqual(sketch.quantile(0.0), self.values.min())
+        self.assertEqual(sketch.quantile(1.0), self.values.max())
+
+    def test_size_is_bounded(self):
+        sketch = QuantileSketch(compression=50)
+        for chunk in np.array_split(self.values, 100):
+            sketch.update(chunk)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLessEqual(len(sketch.means), 50)
+
+    def test_merge(self):
+        left, right = QuantileSketch(), QuantileSketch()
+        left.update(self.values[:20000])
+        right.update(self.values[20000:])
+        left.merge(right)
+        self.assertEqual(left.count, len(self.values))
+        self.assertAlmostEqual(
+            left.quantile(0.5), np.median(self.values), delta=1.0
+        )
+
+    def test_empty(self):
+        sketch = QuantileSketch()
+        sketch.update([np.nan])
+        self.assertIsNone(sketch.quantile(0.5))
+
+
+class TestCohortStats(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame(
+            {
+                "Marker Name": ["HDL", " HDL", "LDL", "LDL", "WBC", "WBC"],
+                "Value": ["40", "60", "100", "<5", "5.2", "5200"],
+                "Units": [
+                    "mg/dL",
+                    "mg/dL",
+                    "mg/dL",
+                    "mg/dL",
+                    "x10E3/uL",
+                    "/uL",
+                ],
+            }
+        )
+
+    def test_update_from_frame(self):
+        cohort = CohortStats()
+        cohort.update_from_frame(self.data)
+        self.assertEqual(cohort.markers, ["HDL", "LDL", "WBC"])
+        self.assertEqual(cohort.sketches[("LDL", "mg/dL")].count, 1)
+        percentiles = cohort.percentiles("HDL", "mg/dL", (0, 50, 100))
+        self.assertEqual(percentiles, {0: 40.0, 50: 50.0, 100: 60.0})
+        self.assertIsNone(cohort.percentiles("Glucose", "mg/dL"))
+
+    def test_units_are_kept_apart(self):
+        cohort = CohortStats()
+        cohort.update_from_frame(self.data)
+        self.assertEqual(
+            cohort.percentiles("WBC", "x10E3/uL", (50,)), {50: 5.2}
+        )
+        self.assertEqual(cohort.percentiles("WBC", "/uL", (50,)), {50: 5200.0})
+        self.assertIsNone(cohort.percentiles("HDL", "mmol/L"))
+
+    def test_save_load(self):
+        cohort = CohortStats()
+        cohort.update_from_frame(self.data)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cohort.json")
+            cohort.save(path)
+            loaded = CohortStats.load(path)
+        self.assertEqual(sorted(loaded.sketches), sorted(cohort.sketches))
+        self.assertEqual(
+            loaded.percentiles("WBC", "/uL"), cohort.percentiles("WBC", "/uL")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
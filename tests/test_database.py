@@ -0,0 +1,103 @@
+# filename: test_database.py
+# Unit tests for the SQLite results database
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import tempfile
+import unittest
+
+from biomarkerdash.database import ResultsDatabase
+from tests.helpers import make_export
+
+
+class TestResultsDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = ResultsDatabase(
+            os.path.join(self.directory.name, "results.db")
+        )
+        self.first_export = make_export(
+            [
+                ["01/15/19", "HDL", "", 41.0, "mg/dL", "> OR = 40"],
+                ["01/15/19", "LDL", "", "<5", "mg/dL", "<100"],
+                ["06/20/19", "HDL", "", 45.0, "mg/dL", "> OR = 40"],
+            ]
+        )
+        # A later export that overlaps the first one and adds a new draw
+        self.second_export = make_export(
+            [
+                ["06/20/19", "HDL", "", "45", "mg/dL", "> OR = 40"],
+                ["01/10/20", "HDL", "", "50", "mg/dL", "> OR = 40"],
+            ]
+        )
+
+    def tearDown(self):
+        self.database.close()
+        self.directory.cleanup()
+
+    def test_incremental_import(self):
+        self.assertEqual(
+            self.database.import_frame(self.first_export, "p1", "a.csv"), 3
+        )
+        self.assertEqual(
+            self.database.import_frame(self.second_export, "p1", "b.csv"), 1
+        )
+        self.assertEqual(
+            self.database.import_frame(self.first_export, "p2", "c.csv"), 3
+        )
+        self.assertEqual(self.database.patients(), ["p1", "p2"])
+
+        imports = self.database.imports("p1")
+        self.assertEqual(imports["source_path"].tolist(), ["a.csv", "b.csv"])
+        self.assertEqual(imports["rows_read"].tolist(), [3, 2])
+        self.assertEqual(imports["rows_added"].tolist(), [3, 1])
+
+    def test_load(self):
+        self.database.import_frame(self.first_export, "p1")
+        self.database.import_frame(self.second_export, "p1")
+
+        data = self.database.load_frame(
+            "p1", markers=["HDL"], since="2019-06-01"
+        )
+        self.assertEqual(data["Draw Date"].tolist(), ["06/20/19", "01/10/20"])
+        self.assertTrue(data["Marker Description"].isna().all())
+
+        biomarkers = self.database.load_biomarkers("p1")
+        self.assertEqual(sorted(biomarkers), ["HDL", "LDL"])
+        self.assertEqual(biomarkers["HDL"].ref_range, (40.0, None))
+        self.assertEqual(
+            biomarkers["HDL"].history["Value"].tolist(), [41, 45, 50]
+        )
+        self.assertEqual(biomarkers["LDL"].history["Value"].tolist(), ["<5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# filename: test_dedup.py
+# Unit tests for deduplication of overlapping exports
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import tempfile
+import unittest
+
+from biomarkerdash.dedup import ExportDeduplicator, iter_deduplicated_exports
+from tests.helpers import make_export
+
+# Exports from several sources, reduced to the columns used for hashing
+COLUMNS = ["Draw Date", "Marker Name", "Value", "Units", "Source"]
+
+
+class TestExportDeduplicator(unittest.TestCase):
+    def test_exact_duplicates(self):
+        deduplicator = ExportDeduplicator()
+        first = make_export(
+            [
+                ["01/15/19", "HDL", 41.0, "mg/dL", "Quest"],
+                ["01/15/19", "HDL", 41.0, "mg/dL", "Quest"],
+                ["06/20/19", "HDL", 45.0, "mg/dL", "Quest"],
+            ],
+            COLUMNS,
+        )
+        second = make_export(
+            [
+                ["06/20/19", "HDL ", "45", "mg/dL", "Quest"],
+                ["01/10/20", "HDL", "50", "mg/dL", "Quest"],
+            ],
+            COLUMNS,
+        )
+        self.assertEqual(len(deduplicator.add(first)), 2)
+        unique = deduplicator.add(second)
+        self.assertEqual(unique["Draw Date"].tolist(), ["01/10/20"])
+        self.assertEqual(deduplicator.stats["rows_read"], 5)
+        self.assertEqual(deduplicator.stats["duplicates_removed"], 2)
+        self.assertTrue(deduplicator.conflicts.empty)
+
+    def test_conflicts(self):
+        deduplicator = ExportDeduplicator()
+        deduplicator.add(
+            make_export(
+                [["01/15/19", "LDL", "<5", "mg/dL", "Quest"]], COLUMNS
+            ),
+            "a",
+        )
+        unique = deduplicator.add(
+            make_export(
+                [
+                    ["01/15/19", "LDL", 4.0, "mg/dL", "Quest"],
+                    ["01/15/19", "HDL", 41.0, "mg/dL", "Quest"],
+                    ["01/15/19", "HDL", 42.0, "mg/dL", "LabCorp"],
+                    ["01/15/19", "HDL", 41.0, "mg/dL", "LabCorp"],
+                ],
+                COLUMNS,
+            ),
+            "b",
+        )
+        # Conflicting rows are kept, but flagged
+        self.assertEqual(len(unique), 4)
+        conflicts = deduplicator.conflicts
+        self.assertEqual(conflicts["Marker Name"].tolist(), ["LDL", "HDL"])
+        self.assertEqual(conflicts["Value"].tolist(), ["4.0", "42.0"])
+        self.assertEqual(conflicts["Export"].tolist(), ["b", "b"])
+
+    def test_iter_exports(self):
+        rows = [
+            ["01/15/19", "HDL", "HDL Cholesterol", 41, "mg/dL", ">39"],
+            ["06/20/19", "HDL", "HDL Cholesterol", 45, "mg/dL", ">39"],
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_paths = []
+            for name, export_rows in [("a", rows[:1]), ("b", rows)]:
+                csv_path = os.path.join(directory, f"{name}.csv")
+                make_export(export_rows).to_csv(csv_path, index=False)
+                csv_paths.append(csv_path)
+
+            deduplicator = ExportDeduplicator()
+            exports = list(iter_deduplicated_exports(csv_paths, deduplicator))
+
+        # Each export is returned on its own, without the rows seen before
+        self.assertEqual([path for path, _ in exports], csv_paths)
+        self.assertEqual([len(unique) for _, unique in exports], [1, 1])
+        self.assertEqual(exports[1][1]["Value"].tolist(), [45])
+        self.assertEqual(deduplicator.stats["duplicates_removed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# filename: test_derived.py
+# Unit tests for derived biomarkers
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import tempfile
+import unittest
+
+from biomarkerdash.derived import (
+    DerivedMarker,
+    compute_derived_markers,
+    load_derived_markers,
+)
+from tests.helpers import make_biomarker
+
+
+class TestDerivedMarkers(unittest.TestCase):
+    def setUp(self):
+        self.biomarkers = {
+            "Total Cholesterol": make_biomarker(
+                "Total Cholesterol",
+                (None, None),
+                [("01/15/19", 200.0), ("06/20/19", 180.0), ("01/10/20", 190)],
+            ),
+            # No HDL on 06/20/19, and a non-numeric value on 01/10/20
+            "HDL": make_biomarker(
+                "HDL",
+                (None, None),
+                [("01/10/20", "<5"), ("01/15/19", 50.0), ("03/01/20", 60.0)],
+            ),
+        }
+
+    def test_inputs(self):
+        derived = DerivedMarker(
+            "Ratio", "sqrt(`Total Cholesterol`) / HDL + HDL", "", "<5.0"
+        )
+        self.assertEqual(derived.inputs, ["sqrt", "Total Cholesterol", "HDL"])
+        self.assertEqual(derived.ref_range, (None, 5.0))
+
+    def test_compute(self):
+        derived = compute_derived_markers(
+            self.biomarkers,
+            [
+                DerivedMarker("Ratio", "`Total Cholesterol` / HDL", "ratio"),
+                DerivedMarker("Double Ratio", "Ratio * 2"),
+                DerivedMarker("Missing", "LDL / HDL"),
+            ],
+        )
+        self.assertEqual(sorted(derived), ["Double Ratio", "Ratio"])
+        ratio = derived["Ratio"]
+        self.assertEqual(ratio.unit, "ratio")
+        self.assertEqual(ratio.history["Value"].tolist(), [4.0])
+        self.assertEqual(
+            ratio.history["Draw Date"].dt.strftime("%m/%d/%y").tolist(),
+            ["01/15/19"],
+        )
+        self.assertEqual(
+            derived["Double Ratio"].history["Value"].tolist(), [8.0]
+        )
+
+    def test_fill_reported_dates(self):
+        reported = make_biomarker("Ratio", (None, None), [("01/15/19", 3.9)])
+        reported.ref_range = (None, 5.0)
+        self.biomarkers["Ratio"] = reported
+        self.biomarkers["HDL"].add_history_entry("01/10/20", 38.0, "mg/dL")
+        derived = compute_derived_markers(
+            self.biomarkers,
+            [DerivedMarker("Ratio", "`Total Cholesterol` / HDL", "ratio")],
+        )
+        # The lab's value is kept, and later draws are filled in
+        ratio = derived["Ratio"]
+        self.assertEqual(ratio.history["Value"].tolist(), [3.9, 5.0])
+        self.assertEqual(ratio.unit, "mg/dL")
+        self.assertEqual(ratio.ref_range, (None, 5.0))
+        self.assertEqual(len(reported.history), 1)
+
+        # Nothing is derived when the lab reported every draw date
+        self.assertEqual(
+            compute_derived_markers(
+                {**self.biomarkers, "Ratio": derived["Ratio"]},
+                [DerivedMarker("Ratio", "`Total Cholesterol` / HDL")],
+            ),
+            {},
+        )
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "derived.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(
+                    "Non-HDL:\n"
+                    "  formula: '`Total Cholesterol` - HDL'\n"
+                    "  unit: mg/dL\n"
+                    "  reference_range: '<130'\n"
+                    "Broken:\n"
+                    "  unit: mg/dL\n"
+                )
+            with self.assertRaises(ValueError):
+                load_derived_markers(path)
+
+    def test_repository_definitions(self):
+        path = os.path.join(
+            os.path.dirname(__file__), "..", "derived_markers.yaml"
+        )
+        derived = compute_derived_markers(
+            self.biomarkers, load_derived_markers(path)
+        )
+        self.assertEqual(
+            derived["Non-HDL Cholesterol (Calculated)"]
+            .history["Value"]
+            .tolist(),
+            [150.0],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# filename: test_diagnostics.py
+# Unit tests for the diagnostics collector
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import biomarkerdash.diagnostics as diag
+import biomarkerdash.utils as util
+
+
+class TestDiagnostics(unittest.TestCase):
+    def setUp(self):
+        self.diagnostics = diag.Diagnostics(max_examples=2)
+        self.previous = diag.set_collector(self.diagnostics)
+
+    def tearDown(self):
+        diag.set_collector(self.previous)
+
+    def test_aggregation(self):
+        for value in range(5):
+            diag.report(diag.UNIT_CHANGE, "HDL", "mg/dL", value)
+        diag.report(diag.NON_NUMERIC_VALUES, "LDL")
+
+        self.assertIs(diag.get_collector(), self.diagnostics)
+        self.assertEqual(self.diagnostics.total, 6)
+        self.assertEqual(self.diagnostics.counts[(diag.UNIT_CHANGE, "HDL")], 5)
+        self.assertEqual(
+            self.diagnostics.examples[(diag.UNIT_CHANGE, "HDL")],
+            ["unit changed from mg/dL to 0", "unit changed from mg/dL to 1"],
+        )
+        self.assertEqual(
+            self.diagnostics.summary().splitlines(),
+            [
+                "6 issues found in the data:",
+                "- non-numeric values for LDL, once: not plotted, values "
+                "aren't all numeric",
+                "- unit change for HDL, 5 times: unit changed from mg/dL "
+                "to 0",
+            ],
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "diagnostics.json")
+            self.diagnostics.save(path)
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), self.diagnostics.to_dict())
+
+        self.diagnostics.clear()
+        self.assertEqual(
+            self.diagnostics.summary(), "No issues found in the data"
+        )
+
+    def test_ref_range_issues(self):
+        data = pd.DataFrame(
+            {
+                "Draw Date": ["01/15/19", "06/20/19", "01/10/20"],
+                "Marker Name": ["HDL", "HDL", "LDL"],
+                "Units": ["mg/dL", "mg/dL", "mg/dL"],
+                "Reference Range": ["> OR = 40", "> OR = 45", "normal"],
+            }
+        )
+        util.parse_wellnessfx_ref_ranges(data)
+        self.assertEqual(
+            self.diagnostics.counts,
+            {
+                (diag.RANGE_CONFLICT, "HDL"): 1,
+                (diag.RANGE_PARSE_ERROR, "LDL"): 1,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
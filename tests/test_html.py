@@ -0,0 +1,133 @@
+# filename: test_html.py
+# Unit tests for the generated HTML pages
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import unittest
+
+import biomarkerdash.analytics as analytics
+import biomarkerdash.html as htm
+from tests.helpers import make_biomarker
+
+CSS_FILEPATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "_includes",
+    "styles.css",
+)
+
+
+class TestOutOfRangeHtml(unittest.TestCase):
+    def setUp(self):
+        self.biomarkers = {
+            "LDL": make_biomarker(
+                "LDL", (None, 100.0), [("01/01/20", 90), ("01/01/21", 130)]
+            ),
+            "HDL": make_biomarker(
+                "HDL", (40.0, None), [("01/01/21", 50), ("01/01/22", 35)]
+            ),
+            "Glucose": make_biomarker(
+                "Glucose", (65.0, 99.0), [("01/01/22", 80)]
+            ),
+        }
+        self.data = analytics.biomarkers_to_frame(self.biomarkers)
+
+    def test_flagged_markers(self):
+        html = htm.create_out_of_range_html(self.data)
+        self.assertIn("LDL", html)
+        self.assertIn("HDL", html)
+        self.assertNotIn("Glucose", html)
+        self.assertIn(
+            '<td>&lt;100</td><td class="status-high">high</td>', html
+        )
+        self.assertIn('<td>&gt;40</td><td class="status-low">low</td>', html)
+
+    def test_sorted_by_latest_draw(self):
+        html = htm.create_out_of_range_html(self.data)
+        # HDL was drawn most recently, so it is listed first
+        self.assertLess(html.index("HDL"), html.index("LDL"))
+
+    def test_marker_links(self):
+        html = htm.create_out_of_range_html(
+            self.data, marker_links={"LDL": "lipids.html#LDL"}
+        )
+        self.assertIn('<a href="lipids.html#LDL">LDL</a>', html)
+        self.assertIn("<td>HDL</td>", html)
+
+    def test_all_within_range(self):
+        data = analytics.biomarkers_to_frame(
+            {"Glucose": self.biomarkers["Glucose"]}
+        )
+        html = htm.create_out_of_range_html(data)
+        self.assertIn("All markers are within their reference ranges.", html)
+        self.assertNotIn("<table", html)
+
+
+class TestHeaderToc(unittest.TestCase):
+    def setUp(self):
+        self.category_files = {"Lipids": "lipids.html"}
+        self.summary_files = {htm.OUT_OF_RANGE_PAGE_TITLE: "out_of_range.html"}
+
+    def test_summary_pages_listed(self):
+        html = htm.create_header_toc(
+            self.category_files,
+            CSS_FILEPATH,
+            summary_files=self.summary_files,
+        )
+        self.assertIn('<ul class="summary-pages">', html)
+        self.assertIn(
+            f'<li><a href="out_of_range.html">'
+            f"{htm.OUT_OF_RANGE_PAGE_TITLE}</a></li>",
+            html,
+        )
+        # Summary pages come before the categories
+        self.assertLess(
+            html.index("out_of_range.html"), html.index("lipids.html")
+        )
+
+    def test_current_summary_page_bold(self):
+        html = htm.create_header_toc(
+            self.category_files,
+            CSS_FILEPATH,
+            current_category=htm.OUT_OF_RANGE_PAGE_TITLE,
+            summary_files=self.summary_files,
+        )
+        self.assertIn(
+            '<a href="out_of_range.html" style="font-weight: bold;">', html
+        )
+        self.assertIn('<li><a href="lipids.html">Lipids</a></li>', html)
+
+    def test_no_summary_pages(self):
+        html = htm.create_header_toc(self.category_files, CSS_FILEPATH)
+        self.assertNotIn('<ul class="summary-pages">', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# filename: test_output.py
+# Unit tests for the content-addressed output store
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import tempfile
+import unittest
+
+import biomarkerdash.html as htm
+import biomarkerdash.plotting as plot
+from biomarkerdash.output import BackgroundWriter, ContentStore
+from tests.helpers import make_biomarker
+
+
+class TestContentStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        self.store = ContentStore(os.path.join(self.root, "store"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, filename):
+        with open(os.path.join(self.root, filename), encoding="utf-8") as f:
+            return f.read()
+
+    def test_identical_content_is_stored_once(self):
+        self.store.write_text(os.path.join(self.root, "a.html"), "same")
+        self.store.write_text(os.path.join(self.root, "b.html"), "same")
+        self.assertEqual(self.store.stats["objects_written"], 1)
+        self.assertEqual(self.store.stats["objects_reused"], 1)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.root, "a.html"),
+                os.path.join(self.root, "b.html"),
+            )
+        )
+
+    def test_overwrite_does_not_modify_shared_object(self):
+        self.store.write_text(os.path.join(self.root, "a.html"), "same")
+        self.store.write_text(os.path.join(self.root, "b.html"), "same")
+        self.store.write_text(os.path.join(self.root, "a.html"), "changed")
+        self.assertEqual(self.read("a.html"), "changed")
+        self.assertEqual(self.read("b.html"), "same")
+
+    def test_direct_write_does_not_modify_shared_object(self):
+        for filename in ("Cat.html", "HDL.html", "Other.html"):
+            self.store.write_text(os.path.join(self.root, filename), "old")
+        htm.combine_html_files("Cat", ["new"], self.root)
+        hdl = make_biomarker("HDL", (40.0, None), [("01/15/19", 45.0)])
+        plot.plot_history(
+            hdl, os.path.join(self.root, "HDL.html"), include_plotlyjs=False
+        )
+        self.assertIn("new", self.read("Cat.html"))
+        self.assertIn("HDL", self.read("HDL.html"))
+        self.assertEqual(self.read("Other.html"), "old")
+
+    def test_link_modes(self):
+        for link_mode in ("symlink", "copy"):
+            store = ContentStore(self.store.root, link_mode=link_mode)
+            path = os.path.join(self.root, f"{link_mode}.html")
+            store.write_text(path, link_mode)
+            self.assertEqual(self.read(f"{link_mode}.html"), link_mode)
+            self.assertEqual(os.path.islink(path), link_mode == "symlink")
+        with self.assertRaises(ValueError):
+            ContentStore(self.store.root, link_mode="unknown")
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    def test_writes_and_stats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with BackgroundWriter(max_queue_size=2) as writer:
+                for i in range(10):
+                    writer.write_text(
+                        os.path.join(directory, f"{i}.html"), str(i)
+                    )
+            stats = writer.stats()
+            self.assertEqual(stats["writes"], 10)
+            self.assertEqual(stats["queue_depth"], 0)
+            self.assertLessEqual(stats["max_queue_depth"], 2)
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                sorted(f"{i}.html" for i in range(10)),
+            )
+            with open(os.path.join(directory, "9.html")) as f:
+                self.assertEqual(f.read(), "9")
+
+    def test_queued_writes_survive_exceptions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(RuntimeError):
+                with BackgroundWriter() as writer:
+                    writer.write_text(os.path.join(directory, "a.html"), "a")
+                    raise RuntimeError("page could not be rendered")
+            self.assertEqual(os.listdir(directory), ["a.html"])
+
+    def test_errors_are_raised(self):
+        writer = BackgroundWriter()
+        writer.write_text("/nonexistent/directory/page.html", "")
+        with self.assertRaises(OSError):
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
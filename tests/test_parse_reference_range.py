@@ -43,6 +43,11 @@ class TestParseReferenceRange(unittest.TestCase):
 
     def test_zero(self):
         self.assertEqual(util.parse_ref_range("0"), (0.0, 0.0))
+        self.assertEqual(util.parse_ref_range("0 mg/dL"), (0.0, 0.0))
+        self.assertEqual(util.parse_ref_range("0 TO 99"), (0.0, 99.0))
+        self.assertEqual(util.parse_ref_range("0 to 200 mg/dL"), (0.0, 200.0))
+        self.assertEqual(util.parse_ref_range("0 OR LESS"), (None, 0.0))
+        self.assertEqual(util.parse_ref_range("0 OR MORE"), (0.0, None))
 
     def test_less_than_format(self):
         self.assertEqual(util.parse_ref_range("<5.7"), (None, 5.7))
@@ -67,9 +72,34 @@ class TestParseReferenceRange(unittest.TestCase):
     def test_special_format(self):
         self.assertEqual(util.parse_ref_range("-2.0 - +2.0"), (-2.0, 2.0))
 
+    def test_unicode_format(self):
+        self.assertEqual(util.parse_ref_range("≤5"), (None, 5.0))
+        self.assertEqual(util.parse_ref_range("≥ 60"), (60.0, None))
+        self.assertEqual(util.parse_ref_range("3.5–5.3"), (3.5, 5.3))
+        self.assertEqual(util.parse_ref_range("3.5 — 5.3"), (3.5, 5.3))
+        self.assertEqual(util.parse_ref_range("−2.0 - +2.0"), (-2.0, 2.0))
+
+    def test_worded_format(self):
+        self.assertEqual(util.parse_ref_range("<=5"), (None, 5.0))
+        self.assertEqual(util.parse_ref_range("up to 5"), (None, 5.0))
+        self.assertEqual(util.parse_ref_range("60 OR MORE"), (60.0, None))
+        self.assertEqual(util.parse_ref_range("3.5 to 5.3"), (3.5, 5.3))
+
+    def test_unit_format(self):
+        self.assertEqual(util.parse_ref_range("65-99 mg/dL"), (65.0, 99.0))
+        self.assertEqual(util.parse_ref_range("<200 mg/dL"), (None, 200.0))
+        self.assertEqual(
+            util.parse_ref_range("> 59 mL/min/1.73m2"), (59.0, None)
+        )
+        self.assertEqual(
+            util.parse_ref_range("150,000-450,000"), (150000.0, 450000.0)
+        )
+
     def test_fail_format(self):
         self.assertEqual(util.parse_ref_range("unparsable"), (None, None))
         self.assertEqual(util.parse_ref_range(""), (None, None))
+        self.assertEqual(util.parse_ref_range("1.2.3-4"), (None, None))
+        self.assertEqual(util.parse_ref_range("<1:40"), (None, None))
 
 
 class TestParseWellnessFxRefRanges(unittest.TestCase):
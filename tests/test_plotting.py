@@ -0,0 +1,142 @@
+# filename: test_plotting.py
+# Unit tests for the biomarker plots
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import base64
+import json
+import os
+import re
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import biomarkerdash.biomarker as bm
+import biomarkerdash.plotting as plot
+
+
+def decode(typed_array):
+    return np.frombuffer(
+        base64.b64decode(typed_array["bdata"]), dtype=typed_array["dtype"]
+    )
+
+
+def plot_data(plot_html):
+    return plot_arguments(plot_html)[0]
+
+
+def plot_layout(plot_html):
+    return plot_arguments(plot_html)[1]
+
+
+def plot_arguments(plot_html):
+    """Decode the data and layout passed to Plotly.newPlot."""
+    match = re.search(r'Plotly\.newPlot\(\s*"[^"]+",\s*', plot_html)
+    decoder = json.JSONDecoder()
+    data, end = decoder.raw_decode(plot_html, match.end())
+    end = re.compile(r",\s*").match(plot_html, end).end()
+    layout = decoder.raw_decode(plot_html, end)[0]
+    return data, layout
+
+
+class TestPlotHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.hdl = bm.Biomarker("HDL", "", "mg/dL", (40.0, None))
+        for draw_date, value in [
+            ("06/20/19", 45.0),
+            ("01/15/19", 35.5),
+            ("01/10/20", 50.0),
+        ]:
+            self.hdl.add_history_entry(draw_date, value, "mg/dL")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_typed_array(self):
+        encoded = plot.typed_array(np.array([1.5, -2.0], dtype=">f8"))
+        self.assertEqual(encoded["dtype"], "f8")
+        self.assertEqual(decode(encoded).tolist(), [1.5, -2.0])
+        self.assertEqual(
+            plot.typed_array(np.array([0, 2], dtype=np.int8))["dtype"], "i1"
+        )
+
+    def test_compact(self):
+        path = os.path.join(self.directory.name, "HDL.html")
+        data = plot_data(
+            plot.plot_history(
+                self.hdl, path, include_plotlyjs=False, compact=True
+            )
+        )
+        self.assertEqual(len(data), 1)
+        trace = data[0]
+        self.assertEqual(trace["mode"], "lines+markers")
+        self.assertEqual(decode(trace["y"]).tolist(), [35.5, 45.0, 50.0])
+        self.assertEqual(
+            pd.to_datetime(decode(trace["x"]), unit="ms").tolist(),
+            pd.to_datetime(
+                ["2019-01-15", "2019-06-20", "2020-01-10"]
+            ).tolist(),
+        )
+        self.assertEqual(decode(trace["marker"]["color"]).tolist(), [1, 0, 0])
+        with open(path, "r", encoding="utf-8") as f:
+            self.assertIn('"type":"date"', f.read())
+
+    def test_default(self):
+        path = os.path.join(self.directory.name, "HDL.html")
+        data = plot_data(
+            plot.plot_history(self.hdl, path, include_plotlyjs=False)
+        )
+        self.assertEqual(
+            [trace["mode"] for trace in data], ["lines", "markers"]
+        )
+
+    def test_percentiles_in_range(self):
+        path = os.path.join(self.directory.name, "HDL.html")
+        percentiles = {0.05: 20.0, 0.5: 55.0, 0.95: 90.0}
+        layout = plot_layout(
+            plot.plot_history(
+                self.hdl, path, include_plotlyjs=False, percentiles=percentiles
+            )
+        )
+        y_range = layout["yaxis"]["range"]
+        self.assertLess(y_range[0], 20.0)
+        self.assertGreater(y_range[1], 90.0)
+
+    def test_non_numeric(self):
+        self.hdl.add_history_entry("03/01/20", "<5", "mg/dL")
+        path = os.path.join(self.directory.name, "HDL.html")
+        self.assertIsNone(plot.plot_history(self.hdl, path, compact=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# filename: test_read_wellnessfx_csv.py
+# Unit tests for reading WellnessFX exports
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import biomarkerdash.utils as util
+
+CSV_CONTENT = """Draw Date, Marker Name ,Marker Description,Value,Units,Reference Range
+10/25/13,HDL,Good cholesterol,55,mg/dL,> OR = 40
+10/25/13,Vitamin B12,,550,pg/mL,200-1100
+10/25/13,Lymphocyte Count (absolute),,1.5,x10E3/?L,850-3900
+01/02/14,HDL,Good cholesterol,61,mg/dL,
+"""
+
+
+class TestReadWellnessFxCsv(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.directory.name, "export.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_CONTENT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_data(self, data):
+        self.assertIn("Marker Name", data.columns)
+        self.assertEqual(data["Units"].iloc[2], "x10E3/μL")
+        self.assertEqual(
+            pd.to_numeric(data["Value"]).tolist(), [55, 550, 1.5, 61]
+        )
+
+    def test_pandas_engine(self):
+        self.check_data(util.read_wellnessfx_csv(self.csv_path))
+
+    @unittest.skipUnless(
+        importlib.util.find_spec("pyarrow"), "pyarrow is not installed"
+    )
+    def test_pyarrow_engine(self):
+        data = util.read_wellnessfx_csv(self.csv_path, engine="pyarrow")
+        self.check_data(data)
+        self.assertIsInstance(data["Units"].dtype, pd.ArrowDtype)
+
+        biomarkers = util.load_wellnessfx_biomarkers(
+            self.csv_path, engine="pyarrow"
+        )
+        self.assertEqual(biomarkers["HDL"].ref_range, (40.0, None))
+        self.assertEqual(len(biomarkers["HDL"].history), 2)
+        self.assertEqual(
+            biomarkers["Lymphocyte Count (absolute)"].ref_range, (0.85, 3.9)
+        )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            util.read_wellnessfx_csv(self.csv_path, engine="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# filename: test_snapshot.py
+# Unit tests for biomarker snapshots and the changes between them
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import tempfile
+import unittest
+
+import biomarkerdash.html as htm
+import biomarkerdash.snapshot as snap
+from tests.helpers import make_biomarker
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.biomarkers = {
+            "HDL": make_biomarker(
+                "HDL", (40.0, None), [("01/15/19", 35.0), ("06/20/19", 50.0)]
+            ),
+            "LDL": make_biomarker(
+                "LDL", (None, 100.0), [("01/15/19", 90.0), ("06/20/19", 120.0)]
+            ),
+            "Glucose": make_biomarker(
+                "Glucose", (65.0, 99.0), [("01/15/19", 80.0)]
+            ),
+            "Vitamin D": make_biomarker(
+                "Vitamin D", (30.0, 100.0), [("06/20/19", 40.0)]
+            ),
+        }
+        earlier = {
+            name: marker.window(until="2019-01-31")
+            for name, marker in self.biomarkers.items()
+            if name != "Vitamin D"
+        }
+        self.previous = snap.take_snapshot(earlier)
+        self.current = snap.take_snapshot(self.biomarkers)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snapshot.json")
+            snap.save_snapshot(self.current, path)
+            loaded = snap.load_snapshot(path)
+        self.assertEqual(loaded.index.tolist(), self.current.index.tolist())
+        self.assertEqual(
+            loaded["latest_date"].tolist(),
+            self.current["latest_date"].tolist(),
+        )
+        self.assertEqual(
+            loaded.loc["LDL", "ref_max"], self.current.loc["LDL", "ref_max"]
+        )
+        self.assertTrue(loaded["ref_min"].isna()["LDL"])
+
+    def test_diff(self):
+        delta = snap.diff_snapshots(self.previous, self.current)
+        # Ordered by the size of the relative change, new markers last
+        self.assertEqual(delta.index.tolist(), ["HDL", "LDL", "Vitamin D"])
+        self.assertEqual(
+            delta["kind"].tolist(),
+            [
+                snap.CHANGE_NEW_RESULT,
+                snap.CHANGE_NEW_RESULT,
+                snap.CHANGE_NEW_MARKER,
+            ],
+        )
+        self.assertEqual(
+            delta["range_change"].tolist(),
+            [snap.RANGE_ENTERED, snap.RANGE_LEFT, ""],
+        )
+        self.assertEqual(delta.loc["HDL", "change"], 15.0)
+        self.assertAlmostEqual(delta.loc["LDL", "percent_change"], 100 / 3)
+        self.assertTrue(snap.diff_snapshots(self.current, self.current).empty)
+
+        report = snap.delta_report(delta)
+        self.assertEqual(report["new_results"], 2)
+        self.assertEqual(report["new_markers"], 1)
+        self.assertEqual(report["entered_range"], ["HDL"])
+        self.assertEqual(report["left_range"], ["LDL"])
+        self.assertEqual(report["markers"][2]["previous_date"], None)
+        json.dumps(report)
+
+        html_content = htm.create_delta_html(delta, {"HDL": "Lipids.html"})
+        self.assertIn('<a href="Lipids.html">HDL</a>', html_content)
+        self.assertIn("Left range: LDL.", html_content)
+
+
+if __name__ == "__main__":
+    unittest.main()
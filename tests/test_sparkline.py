@@ -0,0 +1,72 @@
+# filename: test_sparkline.py
+# Unit tests for inline SVG sparklines
+
+# Copyright (c) 2023, No Translation Layer LLC
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+
+import unittest
+
+import biomarkerdash.biomarker as bm
+from biomarkerdash.constants import COLOR_GREEN, COLOR_RED, COLOR_BG_REF_RANGE
+from biomarkerdash.sparkline import biomarker_sparkline
+
+
+class TestSparkline(unittest.TestCase):
+    def setUp(self):
+        self.biomarker = bm.Biomarker("LDL", "", "mg/dL", (None, 100.0))
+        for draw_date, value in [("01/01/21", 110), ("01/01/20", 90)]:
+            self.biomarker.add_history_entry(draw_date, value, "mg/dL")
+
+    def test_points_and_range(self):
+        svg = biomarker_sparkline(self.biomarker)
+        self.assertTrue(svg.startswith("<svg"))
+        self.assertIn(COLOR_BG_REF_RANGE, svg)
+        self.assertIn("<polyline", svg)
+        self.assertEqual(svg.count("<circle"), 2)
+        # Points are drawn in date order regardless of the history order
+        self.assertLess(svg.index(COLOR_GREEN), svg.index(COLOR_RED))
+
+    def test_no_reference_range(self):
+        self.biomarker.ref_range = (None, None)
+        svg = biomarker_sparkline(self.biomarker)
+        self.assertNotIn(COLOR_BG_REF_RANGE, svg)
+        self.assertEqual(svg.count('fill="grey"'), 2)
+
+    def test_empty(self):
+        self.assertEqual(
+            biomarker_sparkline(bm.Biomarker("LDL", "", "", (None, None))), ""
+        )
+
+    def test_non_numeric(self):
+        self.biomarker.add_history_entry("01/01/22", "<5", "mg/dL")
+        self.assertEqual(biomarker_sparkline(self.biomarker), "")
+
+
+if __name__ == "__main__":
+    unittest.main()